@@ -0,0 +1 @@
+"""Benchmarks of odiff on generated documents, see `python -m benchmarks`"""
@@ -0,0 +1,143 @@
+import json
+import sys
+from argparse import ArgumentParser
+from typing import Any, Dict, List
+
+from benchmarks.compare import NOISE_FLOOR, THRESHOLD, compare, report
+from benchmarks.generate import QUICK_SCENARIOS, SCENARIOS, Scenario
+from benchmarks.importtime import IMPORT_BUDGET_MS, check, measure
+from benchmarks.run import run
+
+
+def main(argv: List[str]) -> int:
+    parser = ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument(
+        "--output",
+        "-o",
+        required=False,
+        default="-",
+        help="file to which to write the JSON results, '-' for stdout",
+    )
+    run_parser.add_argument(
+        "--scenario",
+        "-s",
+        required=False,
+        action="append",
+        default=[],
+        choices=[s.name for s in SCENARIOS],
+        help="scenarios to run, all if not given",
+    )
+    run_parser.add_argument(
+        "--quick",
+        required=False,
+        action="store_true",
+        default=False,
+        help=f"run only the quick scenarios ({', '.join(QUICK_SCENARIOS)})",
+    )
+    run_parser.add_argument(
+        "--repeat",
+        "-n",
+        required=False,
+        type=int,
+        default=3,
+        help="times each phase is timed, the median is compared",
+    )
+    run_parser.add_argument(
+        "--seed",
+        required=False,
+        type=int,
+        default=None,
+        help="seed of every scenario, overriding their own",
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="flag regressions against baseline results"
+    )
+    compare_parser.add_argument("baseline", help="baseline JSON results")
+    compare_parser.add_argument("current", help="current JSON results")
+    compare_parser.add_argument(
+        "--threshold",
+        required=False,
+        type=float,
+        default=THRESHOLD,
+        help="fraction by which a phase may slow before it is flagged",
+    )
+    compare_parser.add_argument(
+        "--noise-floor",
+        required=False,
+        type=float,
+        default=NOISE_FLOOR,
+        help="seconds by which a phase may slow regardless of the threshold",
+    )
+
+    importtime_parser = commands.add_parser(
+        "importtime", help="check the import time of the CLI against a budget"
+    )
+    importtime_parser.add_argument(
+        "--budget",
+        required=False,
+        type=float,
+        default=IMPORT_BUDGET_MS,
+        help="milliseconds the median run may spend importing",
+    )
+    importtime_parser.add_argument(
+        "--repeat",
+        "-n",
+        required=False,
+        type=int,
+        default=5,
+        help="runs of the CLI measured, the median is compared",
+    )
+
+    parsed = parser.parse_args(argv)
+
+    if parsed.command == "importtime":
+        times = measure(parsed.repeat)
+        print(
+            f"Import time: median {times.median:.1f} ms, budget "
+            f"{parsed.budget:.1f} ms, {len(times.modules)} modules"
+        )
+        failures: List[str] = check(times, parsed.budget)
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        return 1 if failures else 0
+
+    if parsed.command == "run":
+        names: List[str] = parsed.scenario or (
+            QUICK_SCENARIOS if parsed.quick else [s.name for s in SCENARIOS]
+        )
+        scenarios: List[Scenario] = [s for s in SCENARIOS if s.name in names]
+        if parsed.seed is not None:
+            for s in scenarios:
+                s.seed = parsed.seed
+        results: Dict[str, Any] = run(scenarios, parsed.repeat)
+        serialized: str = json.dumps(results, indent=2) + "\n"
+        if parsed.output == "-":
+            sys.stdout.write(serialized)
+        else:
+            with open(parsed.output, "w") as f:
+                f.write(serialized)
+        return 0
+
+    with open(parsed.baseline) as f:
+        baseline: Dict[str, Any] = json.load(f)
+    with open(parsed.current) as f:
+        current: Dict[str, Any] = json.load(f)
+    comparisons = compare(baseline, current)
+    print(report(comparisons, parsed.threshold, parsed.noise_floor))
+    regressions = [
+        c
+        for c in comparisons
+        if c.regressed(parsed.threshold, parsed.noise_floor)
+    ]
+    if regressions:
+        print(f"{len(regressions)} phase(s) regressed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main(sys.argv[1:]))
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from tabulate import tabulate
+
+THRESHOLD = 0.10
+NOISE_FLOOR = 0.001
+
+
+@dataclass
+class Comparison:
+    """Median timings of one phase of one scenario, before and after
+
+    :param scenario: str, name of the scenario
+    :param phase: str, name of the phase
+    :param baseline: float, median seconds in the baseline results
+    :param current: float, median seconds in the current results
+    """
+
+    scenario: str
+    phase: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def regressed(self, threshold: float, noise_floor: float) -> bool:
+        """Slower by more than `threshold`, and by more than `noise_floor`
+        seconds, so timer noise of very quick phases is not flagged"""
+        return (
+            self.ratio > 1 + threshold
+            and self.current - self.baseline > noise_floor
+        )
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> List[Comparison]:
+    """Pair the phases of every scenario found in both results"""
+    comparisons: List[Comparison] = []
+    for name, result in current["scenarios"].items():
+        if name not in baseline["scenarios"]:
+            continue
+        before = baseline["scenarios"][name]["phases"]
+        for phase, timings in result["phases"].items():
+            if phase in before:
+                comparisons.append(
+                    Comparison(
+                        name,
+                        phase,
+                        before[phase]["median"],
+                        timings["median"],
+                    )
+                )
+    return comparisons
+
+
+def report(
+    comparisons: List[Comparison],
+    threshold: float = THRESHOLD,
+    noise_floor: float = NOISE_FLOOR,
+) -> str:
+    """Tabulate the comparisons, marking regressions"""
+    return tabulate(
+        [
+            [
+                c.scenario,
+                c.phase,
+                f"{c.baseline * 1000:.2f}",
+                f"{c.current * 1000:.2f}",
+                f"{c.ratio:.2f}x",
+                "REGRESSED" if c.regressed(threshold, noise_floor) else "",
+            ]
+            for c in comparisons
+        ],
+        headers=["Scenario", "Phase", "Baseline ms", "Current ms", "Ratio", ""],
+        tablefmt="rounded_grid",
+    )
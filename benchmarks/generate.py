@@ -0,0 +1,187 @@
+import copy
+import random
+import string
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from odiff.options import OdiffConfig
+
+ID_KEY = "_id"
+
+
+@dataclass
+class Scenario:
+    """Shape of a generated pair of documents
+
+    :param name: str, name under which results are reported
+    :param seed: int, seed of the generator, equal scenarios generate equal
+        documents
+    :param records: int, number of records in the top-level list
+    :param depth: int, levels of nesting within each record
+    :param list_length: int, length of the lists within each record
+    :param keyed: bool, whether lists of records are configured with a list
+        index
+    :param mutation_rate: float, probability of changing each value of the
+        right document
+    :param exclusions: int, number of paths excluded by the config
+    :param duplicates: float, fraction of the elements of scalar lists which
+        repeat an earlier element
+    :param fmt: str, format of the written files, "json" or "yaml"
+    """
+
+    name: str
+    seed: int = 0
+    records: int = 1000
+    depth: int = 3
+    list_length: int = 5
+    keyed: bool = True
+    mutation_rate: float = 0.01
+    exclusions: int = 2
+    duplicates: float = 0.0
+    fmt: str = "json"
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("small", records=100),
+    Scenario("medium", records=2000),
+    Scenario("large", records=20000, depth=2),
+    Scenario("deep", records=200, depth=8, list_length=3),
+    Scenario("wide-lists", records=200, depth=2, list_length=200),
+    Scenario("unkeyed", records=2000, keyed=False),
+    Scenario("duplicates", records=500, list_length=50, duplicates=0.8),
+    Scenario("churn", records=2000, mutation_rate=0.2),
+    Scenario("exclusions", records=2000, exclusions=50),
+    Scenario("yaml", records=2000, fmt="yaml"),
+]
+
+QUICK_SCENARIOS: List[str] = ["small", "deep", "duplicates", "yaml"]
+
+_FIELDS: List[str] = [
+    "name",
+    "kind",
+    "owner",
+    "region",
+    "enabled",
+    "replicas",
+    "timeout",
+    "image",
+    "labels",
+    "ports",
+]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+
+
+def _scalar(rng: random.Random) -> Any:
+    match rng.randrange(5):
+        case 0:
+            return rng.randint(0, 10000)
+        case 1:
+            return round(rng.uniform(0, 100), 3)
+        case 2:
+            return rng.random() < 0.5
+        case _:
+            return _word(rng)
+
+
+def _scalars(rng: random.Random, scenario: Scenario) -> List[Any]:
+    values: List[Any] = []
+    for _ in range(scenario.list_length):
+        if values and rng.random() < scenario.duplicates:
+            values.append(rng.choice(values))
+        else:
+            values.append(_scalar(rng))
+    return values
+
+
+def _record(rng: random.Random, scenario: Scenario, depth: int) -> Any:
+    # Nested iteratively; each level is a dictionary of scalars, a list of
+    #  scalars, a list of keyed records, and the next level
+    root: Dict[str, Any] = {}
+    level: Dict[str, Any] = root
+    for d in range(depth):
+        for field in rng.sample(_FIELDS, k=4):
+            level[field] = _scalar(rng)
+        level["values"] = _scalars(rng, scenario)
+        if d < depth - 1:
+            level["items"] = [
+                {ID_KEY: f"{d}-{i}", "value": _scalar(rng)}
+                for i in range(scenario.list_length)
+            ]
+            level["child"] = {}
+            level = level["child"]
+    return root
+
+
+def _mutate(rng: random.Random, obj: Any, rate: float) -> Any:
+    # Walked with an explicit stack, changing, dropping, or adding values
+    stack: List[Any] = [obj]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            for k in list(container):
+                v = container[k]
+                if k == ID_KEY:
+                    continue
+                if isinstance(v, (dict, list)):
+                    stack.append(v)
+                elif rng.random() < rate:
+                    if rng.random() < 0.2:
+                        del container[k]
+                    else:
+                        container[k] = _scalar(rng)
+            if rng.random() < rate:
+                container[_word(rng)] = _scalar(rng)
+        else:
+            for i, v in enumerate(container):
+                if isinstance(v, (dict, list)):
+                    stack.append(v)
+                elif rng.random() < rate:
+                    container[i] = _scalar(rng)
+    return obj
+
+
+def _config(scenario: Scenario) -> OdiffConfig:
+    config: OdiffConfig = OdiffConfig()
+    if scenario.keyed:
+        config.list_indices["."] = ID_KEY
+        path: str = "[]"
+        for _ in range(scenario.depth - 1):
+            config.list_indices[f"{path}.items"] = ID_KEY
+            path += ".child"
+    # One exclusion of a field of the records, the rest of paths beneath them
+    rng: random.Random = random.Random(scenario.seed + 1)
+    for i in range(scenario.exclusions):
+        path = f"[].{rng.choice(_FIELDS)}"
+        config.exclusions.append(path if i == 0 else f"{path}.{_word(rng)}")
+    return config
+
+
+def generate_pair(scenario: Scenario) -> Tuple[Any, Any, OdiffConfig]:
+    """Generate a pair of documents and the config with which to diff them
+
+    The left document is a list of records, the right a mutated copy of it
+     with some records removed and others added
+
+    :param scenario: :class:`Scenario`, the shape of the documents
+
+    :return: The left and right documents, and the config
+    :rtype: Tuple[Any, Any, OdiffConfig]
+    """
+    rng: random.Random = random.Random(scenario.seed)
+    left: List[Any] = []
+    for i in range(scenario.records):
+        record = _record(rng, scenario, scenario.depth)
+        record[ID_KEY] = f"r{i}"
+        left.append(record)
+    right: List[Any] = _mutate(rng, copy.deepcopy(left), scenario.mutation_rate)
+    for _ in range(int(scenario.records * scenario.mutation_rate)):
+        if right:
+            right.pop(rng.randrange(len(right)))
+        record = _record(rng, scenario, scenario.depth)
+        record[ID_KEY] = f"n{rng.randrange(1 << 30)}"
+        right.append(record)
+    rng.shuffle(right)
+    return left, right, _config(scenario)
@@ -0,0 +1,100 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from tempfile import TemporaryDirectory
+from typing import List, Set
+
+IMPORT_BUDGET_MS = 150.0
+
+# Imported only by the features which need them, never by a plain diff of two
+#  JSON files
+DEFERRED_MODULES: List[str] = [
+    "yaml",
+    "tabulate",
+    "dacite",
+    "colorlog",
+    "difflib",
+    "pprint",
+    "cProfile",
+    "tempfile",
+    "multiprocessing",
+    "odiff.batch",
+    "odiff.cache",
+    "odiff.documents",
+    "odiff.merkle",
+    "odiff.patch",
+    "odiff.serve",
+    "odiff.session",
+    "odiff.stream",
+    "odiff.watch",
+]
+
+
+@dataclass
+class ImportTimes:
+    """Import times of runs of the CLI on two small JSON files
+
+    :param totals: List[float], milliseconds spent importing in each run
+    :param modules: Set[str], every module imported by any run
+    """
+
+    totals: List[float] = field(default_factory=list)
+    modules: Set[str] = field(default_factory=set)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.totals)
+
+    def eager(self) -> List[str]:
+        """The deferred modules which were imported nonetheless"""
+        return [m for m in DEFERRED_MODULES if m in self.modules]
+
+
+def _run(lfname: str, rfname: str, times: ImportTimes):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "odiff.main"]
+        + [lfname, rfname, "--output", "one-line"],
+        capture_output=True,
+        text=True,
+    )
+    total: int = 0
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        total += int(self_us)
+        times.modules.add(name.strip())
+    times.totals.append(total / 1000)
+
+
+def measure(repeat: int = 5) -> ImportTimes:
+    """Time the imports of `repeat` runs of the CLI, in fresh interpreters"""
+    times: ImportTimes = ImportTimes()
+    with TemporaryDirectory() as tmp:
+        lfname: str = os.path.join(tmp, "left.json")
+        rfname: str = os.path.join(tmp, "right.json")
+        with open(lfname, "w") as f:
+            json.dump({"a": 1, "b": [1, 2]}, f)
+        with open(rfname, "w") as f:
+            json.dump({"a": 2, "b": [1, 3]}, f)
+        for _ in range(repeat):
+            _run(lfname, rfname, times)
+    return times
+
+
+def check(times: ImportTimes, budget: float = IMPORT_BUDGET_MS) -> List[str]:
+    """Failures of the import time budget, empty if within it"""
+    failures: List[str] = []
+    if times.median > budget:
+        failures.append(
+            f"Median import time {times.median:.1f} ms exceeds the budget "
+            f"of {budget:.1f} ms"
+        )
+    failures.extend(
+        f"Module '{m}' imported by a plain diff" for m in times.eager()
+    )
+    return failures
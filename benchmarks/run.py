@@ -0,0 +1,100 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, List
+
+import yaml
+
+from benchmarks.generate import Scenario, generate_pair
+from odiff.main import format_discrepancies
+from odiff.odiff import build_unified_diffs, odiff
+from odiff.options import OutputType
+from odiff.util import read_object_file
+
+type PhaseTimings = Dict[str, Dict[str, float]]
+type Results = Dict[str, Any]
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "runs": repeat,
+    }
+
+
+def _write(obj: Any, fname: str, fmt: str):
+    with open(fname, "w") as f:
+        if fmt == "yaml":
+            yaml.safe_dump(obj, f, sort_keys=False)
+        else:
+            json.dump(obj, f)
+
+
+def run_scenario(scenario: Scenario, repeat: int = 3) -> Results:
+    """Time each phase of a diff of a generated pair of documents
+
+    Phases are timed separately and in order, so the unified diffs timed by
+     `build_unified_diffs` are already built when the table is formatted
+
+    :param scenario: :class:`benchmarks.generate.Scenario`, the documents
+    :param repeat: int, number of times each phase is timed
+
+    :return: Timings of each phase, and counts describing the documents
+    :rtype: Dict[str, Any]
+    """
+    left, right, config = generate_pair(scenario)
+    phases: PhaseTimings = {}
+    with TemporaryDirectory() as tmp:
+        lfname: str = os.path.join(tmp, f"left.{scenario.fmt}")
+        rfname: str = os.path.join(tmp, f"right.{scenario.fmt}")
+        _write(left, lfname, scenario.fmt)
+        _write(right, rfname, scenario.fmt)
+        size: int = os.path.getsize(lfname) + os.path.getsize(rfname)
+        phases["read_object_file"] = _time(
+            lambda: (read_object_file(lfname), read_object_file(rfname)),
+            repeat,
+        )
+    discrepancies = odiff(left, right, config, lfname, rfname)
+    phases["odiff"] = _time(
+        lambda: odiff(left, right, config, lfname, rfname), repeat
+    )
+    phases["build_unified_diffs"] = _time(
+        lambda: build_unified_diffs(discrepancies, lfname, rfname), repeat
+    )
+    for output_type in OutputType:
+        phases[f"format_discrepancies[{output_type}]"] = _time(
+            lambda: format_discrepancies(output_type, discrepancies, False),
+            repeat,
+        )
+    return {
+        "bytes": size,
+        "discrepancies": len(discrepancies),
+        "phases": phases,
+    }
+
+
+def run(scenarios: List[Scenario], repeat: int = 3) -> Results:
+    """Run every scenario, with enough about the host to compare results"""
+    results: Results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": repeat,
+        },
+        "scenarios": {},
+    }
+    for scenario in scenarios:
+        print(f"Running {scenario.name}", file=sys.stderr)
+        results["scenarios"][scenario.name] = run_scenario(scenario, repeat)
+    return results
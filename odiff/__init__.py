@@ -1,19 +1,76 @@
-from odiff.discrepancy import Discrepancies, Discrepancy
-from odiff.odiff import (
-    odiff,
-    diff_dicts,
-    diff_lists,
-    diff_values,
-)
-from odiff.options import OdiffConfig, OutputType
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict
+
+if TYPE_CHECKING:
+    from odiff.discrepancy import (
+        Discrepancies,
+        Discrepancy,
+        DiscrepancyTable,
+    )
+    from odiff.infer import infer_list_indices
+    from odiff.odiff import (
+        ExclusionLog,
+        SubtreeMemo,
+        diff_dicts,
+        diff_lists,
+        diff_values,
+        iter_odiff,
+        odiff,
+    )
+    from odiff.options import OdiffConfig, OutputType
+    from odiff.patch import apply_patch, iter_patch, make_patch
+    from odiff.session import OdiffSession
+
+# Exports are imported on first access, so that `odiff.main` does not import
+#  the whole package before it has parsed its arguments
+_EXPORTS: Dict[str, str] = {
+    "odiff": "odiff.odiff",
+    "iter_odiff": "odiff.odiff",
+    "SubtreeMemo": "odiff.odiff",
+    "ExclusionLog": "odiff.odiff",
+    "diff_dicts": "odiff.odiff",
+    "diff_lists": "odiff.odiff",
+    "diff_values": "odiff.odiff",
+    "infer_list_indices": "odiff.infer",
+    "OdiffConfig": "odiff.options",
+    "OutputType": "odiff.options",
+    "Discrepancy": "odiff.discrepancy",
+    "Discrepancies": "odiff.discrepancy",
+    "DiscrepancyTable": "odiff.discrepancy",
+    "OdiffSession": "odiff.session",
+    "iter_patch": "odiff.patch",
+    "make_patch": "odiff.patch",
+    "apply_patch": "odiff.patch",
+}
 
 __all__ = [
     "odiff",
+    "iter_odiff",
+    "SubtreeMemo",
+    "ExclusionLog",
     "diff_dicts",
     "diff_lists",
     "diff_values",
+    "infer_list_indices",
     "OdiffConfig",
     "OutputType",
     "Discrepancy",
     "Discrepancies",
+    "DiscrepancyTable",
+    "OdiffSession",
+    "iter_patch",
+    "make_patch",
+    "apply_patch",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value: Any = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
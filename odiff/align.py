@@ -0,0 +1,277 @@
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from odiff.hashing import canonical
+
+type Box = Tuple[int, int, int, int]
+type Match = Tuple[int, int]
+type Hunk = Tuple[int, int, int, int]
+type Edit = Tuple[Optional[int], Optional[int]]
+
+# Largest hunk, in pairs of elements, whose dictionaries are paired by
+#  similarity rather than position
+PAIRING_MAX_CELLS = 1 << 14
+
+
+def keys_of(l1: List[Any], l2: List[Any]) -> Tuple[List[int], List[int]]:
+    """Number the elements of both lists by :func:`canonical` key, so equal
+    elements have equal numbers and are compared as ints thereafter"""
+    ids: Dict[Hashable, int] = {}
+    k1: List[int] = [ids.setdefault(canonical(e), len(ids)) for e in l1]
+    k2: List[int] = [ids.setdefault(canonical(e), len(ids)) for e in l2]
+    return k1, k2
+
+
+def align(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[Match]:
+    """Longest common subsequence of two sequences, by Myers' diff
+
+    Elements found in only one sequence can match nothing, so are dropped
+     before aligning the rest; lists which share little are then quick
+
+    Uses the linear space refinement, splitting each box of the edit graph at
+     the middle snake of its shortest edit script, with an explicit stack
+     rather than recursion; O((N + M) D) time for D differences
+
+    :param a: Sequence[Hashable], the "left" sequence
+    :param b: Sequence[Hashable], the "right" sequence
+
+    :return: Index pairs of equal elements, ascending in both sequences
+    :rtype: List[Tuple[int, int]]
+    """
+    common: Set[Hashable] = set(a).intersection(b)
+    ia: List[int] = [i for i, k in enumerate(a) if k in common]
+    ib: List[int] = [j for j, k in enumerate(b) if k in common]
+    if len(ia) == len(a) and len(ib) == len(b):
+        return _align(a, b)
+    return [
+        (ia[i], ib[j])
+        for i, j in _align([a[i] for i in ia], [b[j] for j in ib])
+    ]
+
+
+def _align(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[Match]:
+    matches: List[Match] = []
+    # Boxes to align, last first; matches between them are pushed as boxes
+    #  of no size so they are emitted in order
+    stack: List[Box | Match] = [(0, 0, len(a), len(b))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            matches.append(item)
+            continue
+        left, top, right, bottom = item
+        head: List[Match] = []
+        while left < right and top < bottom and a[left] == b[top]:
+            head.append((left, top))
+            left, top = left + 1, top + 1
+        tail: List[Match] = []
+        while left < right and top < bottom and a[right - 1] == b[bottom - 1]:
+            right, bottom = right - 1, bottom - 1
+            tail.append((right, bottom))
+        matches.extend(head)
+        stack.extend(tail)
+        if left == right or top == bottom:
+            continue
+        (x0, y0), (x1, y1), (sx, sy), n = _middle_snake(
+            a, b, left, top, right, bottom
+        )
+        stack.append((x1, y1, right, bottom))
+        stack.extend((sx + i, sy + i) for i in reversed(range(n)))
+        stack.append((left, top, x0, y0))
+    return matches
+
+
+def _middle_snake(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    left: int,
+    top: int,
+    right: int,
+    bottom: int,
+) -> Tuple[Match, Match, Match, int]:
+    # Searches forwards from the top-left and backwards from the bottom-right
+    #  until the paths overlap; returns the end of the box before the snake on
+    #  which they met, the start of the box after it, and the start and length
+    #  of its diagonal, the snake's one edit being outside either
+    width: int = right - left
+    height: int = bottom - top
+    delta: int = width - height
+    odd: bool = bool(delta & 1)
+    most: int = (width + height + 1) // 2
+    offset: int = most + 1
+    # x reached on each forward diagonal k, and y on each backward diagonal c
+    vf: List[int] = [0] * (2 * most + 3)
+    vb: List[int] = [0] * (2 * most + 3)
+    vf[offset + 1] = left
+    vb[offset + 1] = bottom
+    for d in range(most + 1):
+        for k in range(d, -d - 1, -2):
+            c: int = k - delta
+            if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+                px = x = vf[offset + k + 1]
+            else:
+                px = vf[offset + k - 1]
+                x = px + 1
+            y: int = top + (x - left) - k
+            py: int = y if d == 0 or x != px else y - 1
+            while x < right and y < bottom and a[x] == b[y]:
+                x, y = x + 1, y + 1
+            vf[offset + k] = x
+            if odd and -(d - 1) <= c <= d - 1 and y >= vb[offset + c]:
+                n: int = min(x - px, y - py)
+                return (px, py), (x, y), (x - n, y - n), n
+        for c in range(d, -d - 1, -2):
+            k = c + delta
+            if c == -d or (c != d and vb[offset + c - 1] > vb[offset + c + 1]):
+                py = y = vb[offset + c + 1]
+            else:
+                py = vb[offset + c - 1]
+                y = py - 1
+            x = left + (y - top) + k
+            px = x if d == 0 or y != py else x + 1
+            while x > left and y > top and a[x - 1] == b[y - 1]:
+                x, y = x - 1, y - 1
+            vb[offset + c] = y
+            if not odd and -d <= k <= d and x <= vf[offset + k]:
+                return (x, y), (px, py), (x, y), min(px - x, py - y)
+    raise AssertionError("Paths of the edit graph did not meet")
+
+
+def edits(l1: List[Any], l2: List[Any]) -> Iterator[Edit]:
+    """Differences of two lists aligned in order
+
+    Elements are aligned by :func:`canonical` key; within each run of those
+     which are not, dictionaries are paired by the items they share, see
+     :func:`pair`, and the rest by position
+
+    :param l1: List[Any], the "left" list
+    :param l2: List[Any], the "right" list
+
+    :return: Iterator of the indices of paired elements, which differ, and of
+        elements of either list alone, with None for the other index
+    :rtype: Iterator[Tuple[Optional[int], Optional[int]]]
+    """
+    k1, k2 = keys_of(l1, l2)
+    for i0, i1, j0, j1 in hunks(align(k1, k2), len(l1), len(l2)):
+        yield from _hunk_edits(l1, l2, i0, i1, j0, j1)
+
+
+def alignment(
+    l1: List[Any],
+    l2: List[Any],
+    k1: Sequence[Hashable],
+    k2: Sequence[Hashable],
+) -> Iterator[Edit]:
+    """Every element of two lists aligned in order, as :func:`edits`, but by
+    the given keys and including the matches of equal keys
+
+    :param l1: List[Any], the "left" list
+    :param l2: List[Any], the "right" list
+    :param k1: Sequence[Hashable], the key of each element of `l1`
+    :param k2: Sequence[Hashable], the key of each element of `l2`
+
+    :return: Iterator of the indices of matched and paired elements, and of
+        elements of either list alone, with None for the other index,
+        ascending in both lists
+    :rtype: Iterator[Tuple[Optional[int], Optional[int]]]
+    """
+    n: int = len(l1)
+    m: int = len(l2)
+    i: int = 0
+    j: int = 0
+    for x, y in [*align(k1, k2), (n, m)]:
+        if x > i or y > j:
+            yield from _hunk_edits(l1, l2, i, x, j, y)
+        if (x, y) != (n, m):
+            yield x, y
+        i, j = x + 1, y + 1
+
+
+def _hunk_edits(
+    l1: List[Any], l2: List[Any], i0: int, i1: int, j0: int, j1: int
+) -> Iterator[Edit]:
+    i, j = i0, j0
+    for x, y in [*pair(l1, l2, i0, i1, j0, j1), (i1, j1)]:
+        paired: int = min(x - i, y - j)
+        yield from zip(range(i, i + paired), range(j, j + paired))
+        yield from ((a, None) for a in range(i + paired, x))
+        yield from ((None, b) for b in range(j + paired, y))
+        if (x, y) != (i1, j1):
+            yield x, y
+        i, j = x + 1, y + 1
+
+
+def pair(
+    l1: List[Any], l2: List[Any], i0: int, i1: int, j0: int, j1: int
+) -> List[Match]:
+    """Pairs of dictionaries of `l1[i0:i1]` and `l2[j0:j1]`, in order, sharing
+    the most items in total, found by dynamic programming
+
+    :return: Index pairs of dictionaries sharing at least one item, or none if
+        the run is larger than :data:`PAIRING_MAX_CELLS`
+    :rtype: List[Tuple[int, int]]
+    """
+    n: int = i1 - i0
+    m: int = j1 - j0
+    if n * m > PAIRING_MAX_CELLS:
+        return []
+    items1: List[Set[Hashable]] = [_items(e) for e in l1[i0:i1]]
+    items2: List[Set[Hashable]] = [_items(e) for e in l2[j0:j1]]
+    if not any(items1) or not any(items2):
+        return []
+    # Most items shared pairing l1[i0 + i:] with l2[j0 + j:]
+    best: List[List[int]] = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        for j in range(m - 1, -1, -1):
+            shared: int = len(items1[i] & items2[j])
+            best[i][j] = max(
+                best[i + 1][j],
+                best[i][j + 1],
+                best[i + 1][j + 1] + shared if shared else 0,
+            )
+    pairs: List[Match] = []
+    i, j = 0, 0
+    while i < n and j < m:
+        shared = len(items1[i] & items2[j])
+        if shared and best[i][j] == best[i + 1][j + 1] + shared:
+            pairs.append((i0 + i, j0 + j))
+            i, j = i + 1, j + 1
+        elif best[i][j] == best[i + 1][j]:
+            i += 1
+        else:
+            j += 1
+    return pairs
+
+
+def _items(e: Any) -> Set[Hashable]:
+    if not isinstance(e, dict):
+        return set()
+    return {(k, canonical(v)) for k, v in e.items()}
+
+
+def hunks(matches: List[Match], n: int, m: int) -> Iterator[Hunk]:
+    """Runs of unmatched elements between the matches of :func:`align`
+
+    :param matches: List[Tuple[int, int]], the matched index pairs
+    :param n: int, length of the "left" sequence
+    :param m: int, length of the "right" sequence
+
+    :return: Iterator of the start and end of each run in both sequences,
+        either of which may be empty
+    :rtype: Iterator[Tuple[int, int, int, int]]
+    """
+    i: int = 0
+    j: int = 0
+    for x, y in [*matches, (n, m)]:
+        if x > i or y > j:
+            yield i, x, j, y
+        i, j = x + 1, y + 1
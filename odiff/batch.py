@@ -0,0 +1,324 @@
+import json
+import os
+import shlex
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from logging import Logger
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from odiff.cache import SnapshotCache, open_cache
+from odiff.discrepancy import Discrepancy, DiscrepancyTable
+from odiff.loader import load_file
+from odiff.logger import get_logger
+from odiff.odiff import iter_odiff
+from odiff.options import (
+    CacheOptions,
+    OdiffConfig,
+    OutputType,
+    SummaryOptions,
+    TableOptions,
+    UnifiedDiffOptions,
+)
+from odiff.path import Index
+from odiff.stats import Stats
+from odiff.util import ExitCode
+from odiff.writers import (
+    SUMMARY_TYPES,
+    DiscrepancyWriter,
+    writer_for,
+)
+
+log: Logger = get_logger("batch")
+
+
+@dataclass
+class FilePair:
+    """Two files to diff, either of which may be missing
+
+    :param name: str, the name under which the pair is reported
+    :param lfname: Optional[str], the "left" file, `None` if missing
+    :param rfname: Optional[str], the "right" file, `None` if missing
+    """
+
+    name: str
+    lfname: Optional[str]
+    rfname: Optional[str]
+
+
+@dataclass
+class FileReport:
+    """Result of diffing a :class:`FilePair`
+
+    :param pair: :class:`FilePair`, the files diffed
+    :param discrepancies: :class:`odiff.discrepancy.DiscrepancyTable`,
+        discrepancies found between the files, stored compactly to return
+        them from worker processes
+    :param status: :class:`odiff.util.ExitCode`, whether the diff succeeded
+    :param error: Optional[str], description of any failure
+    :param stats: Optional[Stats], counters and timings of the diff, if
+        requested
+    :param truncated: bool, whether the diff stopped at its limit, so more
+        discrepancies may exist
+    """
+
+    pair: FilePair
+    discrepancies: DiscrepancyTable = field(default_factory=DiscrepancyTable)
+    status: ExitCode = ExitCode.CLEAN
+    error: Optional[str] = None
+    stats: Optional[Stats] = None
+    truncated: bool = False
+
+
+@dataclass
+class BatchSummary:
+    """Counts of the pairs in a batch and its most severe status"""
+
+    total: int = 0
+    differing: int = 0
+    failed: int = 0
+    status: ExitCode = ExitCode.CLEAN
+
+    def __str__(self) -> str:
+        s: str = f"Compared {self.total} file pairs"
+        s += f", {self.differing} with discrepancies"
+        return s + (f", {self.failed} failed" if self.failed else "")
+
+
+def pair_directories(ldir: str, rdir: str) -> List[FilePair]:
+    """Pair the files of two directory trees by their relative paths
+
+    Files found in only one tree are paired with `None`
+    """
+    lfiles: Dict[str, str] = _walk_files(ldir)
+    rfiles: Dict[str, str] = _walk_files(rdir)
+    return [
+        FilePair(name, lfiles.get(name), rfiles.get(name))
+        for name in sorted(lfiles.keys() | rfiles.keys())
+    ]
+
+
+def pair_manifest(fname: str) -> List[FilePair]:
+    """Read pairs from a manifest, one shell-quoted pair per line
+
+    Blank lines and lines starting with `#` are ignored
+    """
+    pairs: List[FilePair] = []
+    with open(fname, "r") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            fnames: List[str] = shlex.split(line)
+            if len(fnames) != 2:
+                raise ValueError(
+                    f"Expected two files on line {n} of manifest ({fname})"
+                )
+            lfname, rfname = fnames
+            pairs.append(FilePair(f"{lfname} -> {rfname}", lfname, rfname))
+    return pairs
+
+
+def pair_baseline(baseline: str, fnames: Iterable[str]) -> List[FilePair]:
+    """Pair one baseline file with each of many others"""
+    return [FilePair(fname, baseline, fname) for fname in fnames]
+
+
+def diff_pair(
+    pair: FilePair,
+    config: OdiffConfig,
+    merkle: bool = False,
+    cache_options: Optional[CacheOptions] = None,
+    stats: bool = False,
+    limit: Optional[int] = None,
+) -> FileReport:
+    """Load and diff a pair of files, capturing rather than raising failures
+
+    A file missing from one side is reported as a single discrepancy of the
+     whole of the other file; the diff stops after `limit` discrepancies, if
+     given
+    """
+    report: FileReport = FileReport(pair, stats=Stats() if stats else None)
+    cache: Optional[SnapshotCache] = (
+        open_cache(cache_options) if cache_options else None
+    )
+    try:
+        lobj: Any = (
+            _load(pair.lfname, cache, report.stats) if pair.lfname else None
+        )
+        robj: Any = (
+            _load(pair.rfname, cache, report.stats) if pair.rfname else None
+        )
+        if pair.lfname and pair.rfname:
+            ldigests = rdigests = None
+            if merkle and cache:
+                ldigests = cache.digests(pair.lfname, lobj, config)
+                rdigests = cache.digests(pair.rfname, robj, config)
+            with report.stats.phase("diff") if report.stats else nullcontext():
+                # Diffed to one past the limit, so whether more exist is known
+                for d in iter_odiff(
+                    lobj,
+                    robj,
+                    config,
+                    pair.lfname,
+                    pair.rfname,
+                    merkle=merkle,
+                    ldigests=ldigests,
+                    rdigests=rdigests,
+                    stats=report.stats,
+                    limit=None if limit is None else limit + 1,
+                ):
+                    if len(report.discrepancies) == limit:
+                        report.truncated = True
+                        break
+                    report.discrepancies.append(d)
+        else:
+            d: Discrepancy = (
+                Discrepancy.sub("", robj)
+                if pair.lfname is None
+                else Discrepancy.add("", lobj)
+            )
+            d.lfname, d.rfname = pair.lfname or "", pair.rfname or ""
+            report.discrepancies.append(d)
+    except (OSError, ValueError) as e:
+        report.status, report.error = ExitCode.USER_FAULT, str(e)
+    except Exception as e:
+        report.status, report.error = ExitCode.INTERNAL_FAULT, repr(e)
+    return report
+
+
+def batch_odiff(
+    pairs: List[FilePair],
+    config: OdiffConfig,
+    workers: Optional[int] = None,
+    merkle: bool = False,
+    cache_options: Optional[CacheOptions] = None,
+    stats: bool = False,
+    limit: Optional[int] = None,
+) -> Iterator[FileReport]:
+    """Diff many pairs of files across a pool of processes
+
+    Reports are yielded in the order of `pairs` as they complete
+
+    :param pairs: List[FilePair], the pairs of files to diff
+    :param config: Configuration for index-based comparisons and exclusions
+    :param workers: Optional[int], number of processes, defaulting to the
+        number of CPUs; with one, pairs are diffed in this process
+    :param merkle: bool, whether to skip identical subtrees by digest
+    :param cache_options: Optional[CacheOptions], the snapshot cache used by
+        every process, if any
+    :param stats: bool, whether to gather the stats of each diff
+    :param limit: Optional[int], number of discrepancies after which to stop
+        each diff
+
+    :return: Iterator of reports, one per pair
+    :rtype: Iterator[FileReport]
+    """
+    fn = partial(
+        diff_pair,
+        config=config,
+        merkle=merkle,
+        cache_options=cache_options,
+        stats=stats,
+        limit=limit,
+    )
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pairs) < 2:
+        yield from map(fn, pairs)
+        return
+    chunksize: int = max(1, len(pairs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(fn, pairs, chunksize=chunksize)
+
+
+def write_reports(
+    reports: Iterable[FileReport],
+    output_type: OutputType,
+    out: TextIO,
+    raw: bool = False,
+    unified_diff: Optional[UnifiedDiffOptions] = None,
+    stats: Optional[Stats] = None,
+    quiet: bool = False,
+    table: Optional[TableOptions] = None,
+    summary_options: Optional[SummaryOptions] = None,
+) -> BatchSummary:
+    """Write the discrepancies of each report, grouped by file
+
+    JSON output is a single object keyed by the name of each pair, JSONL
+     output adds the name to each line, and any other output is written per
+     pair under a heading, tables paged and limited by `table`, summaries
+     counting the exclusions of the pair's own stats; pairs without
+     discrepancies are omitted, as is all output if `quiet`
+
+    The stats of each report, if any, are merged into `stats`
+
+    :return: Counts of the pairs and the most severe status of any report
+    :rtype: BatchSummary
+    """
+    summary: BatchSummary = BatchSummary()
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for report in reports:
+        summary.total += 1
+        summary.status = max(summary.status, report.status)
+        if stats is not None and report.stats is not None:
+            stats.merge(report.stats, (Index(report.pair.name),))
+        if report.error is not None:
+            summary.failed += 1
+            log.error(f"Failed to diff ({report.pair.name}): {report.error}")
+            continue
+        if not report.discrepancies:
+            continue
+        summary.differing += 1
+        if quiet:
+            continue
+        if report.truncated:
+            log.warning(
+                f"Output truncated at {len(report.discrepancies)} "
+                f"discrepancies, more exist ({report.pair.name})"
+            )
+        match output_type:
+            case OutputType.JSON:
+                grouped[report.pair.name] = [
+                    d.to_dict() for d in report.discrepancies
+                ]
+            case OutputType.JSONL:
+                for d in report.discrepancies:
+                    line = {"file": report.pair.name, **d.to_dict()}
+                    out.write(json.dumps(line) + "\n")
+            case _:
+                out.write(f"=== {report.pair.name} ===\n")
+                writer: DiscrepancyWriter = writer_for(
+                    output_type,
+                    out,
+                    raw,
+                    unified_diff,
+                    report.stats if output_type in SUMMARY_TYPES else stats,
+                    table,
+                    summary_options,
+                )
+                writer.truncated = report.truncated
+                writer.write_all(report.discrepancies)
+    if output_type == OutputType.JSON and not quiet:
+        out.write(json.dumps(grouped, indent=2) + "\n")
+    out.flush()
+    return summary
+
+
+def _walk_files(root: str) -> Dict[str, str]:
+    files: Dict[str, str] = {}
+    for dirpath, _, fnames in os.walk(root):
+        for fname in fnames:
+            path: str = os.path.join(dirpath, fname)
+            files[os.path.relpath(path, root)] = path
+    return files
+
+
+def _load(
+    fname: str, cache: Optional[SnapshotCache], stats: Optional[Stats]
+) -> Any:
+    obj, err = cache.load(fname, stats) if cache else load_file(fname, stats)
+    if err:
+        if not isinstance(obj, str):
+            raise ValueError(f"Failed to read object file ({fname})")
+        log.warning(f"File not JSON or YAML, read as string ({fname})")
+    return obj
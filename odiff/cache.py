@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import pickle
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from logging import Logger
+from typing import IO, TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from odiff.loader import Loaded, parse_buffer, read_buffer
+from odiff.logger import get_logger
+from odiff.options import CacheOptions, OdiffConfig
+from odiff.path import ConfigKey, config_key
+from odiff.stats import Stats
+
+if TYPE_CHECKING:
+    from odiff.merkle import DigestIndex
+
+log: Logger = get_logger("cache")
+
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def default_cache_dir() -> str:
+    """`$XDG_CACHE_HOME/odiff`, falling back to `~/.cache/odiff`"""
+    base: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "odiff")
+
+
+@dataclass
+class Snapshot:
+    """A parsed input file, with anything precomputed from it per config
+
+    :param size: int, size of the file when parsed
+    :param mtime_ns: int, modification time of the file when parsed
+    :param content_digest: bytes, digest of the content of the file
+    :param obj: Any, the parsed object
+    :param digests: Dict[ConfigKey, List[bytes]], the ordered Merkle digests
+        of the object for each config with which it was diffed
+    """
+
+    size: int
+    mtime_ns: int
+    content_digest: bytes
+    obj: Any
+    digests: Dict[ConfigKey, List[bytes]] = field(default_factory=dict)
+
+
+class SnapshotCache:
+    """On-disk cache of parsed input files, evicted least recently used
+
+    A snapshot is found by the real path of its file and is valid while the
+     file's size and modification time are unchanged; otherwise the content
+     is read and hashed, and the snapshot is still used if the content is
+     the same, so neither YAML/JSON parsing nor digesting is repeated
+
+    :param options: :class:`odiff.options.CacheOptions`, the directory and
+        size bound of the cache
+    """
+
+    def __init__(self, options: CacheOptions):
+        self.directory: str = options.directory or default_cache_dir()
+        self.max_bytes: int = options.max_bytes
+        self.snapshots: Dict[str, Snapshot] = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self, fname: str, stats: Optional[Stats] = None) -> Loaded:
+        """Load a file as :func:`odiff.loader.load_file` would"""
+        st: os.stat_result = os.stat(fname)
+        snapshot: Optional[Snapshot] = self._read(fname)
+        if snapshot and (snapshot.size, snapshot.mtime_ns) == (
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            log.debug(f"Cache hit ({fname})")
+            self.snapshots[fname] = snapshot
+            return snapshot.obj, None
+        buf: bytes = read_buffer(fname)
+        content_digest: bytes = _content_digest(buf)
+        if snapshot and snapshot.content_digest == content_digest:
+            log.debug(f"Cache hit on content ({fname})")
+            snapshot.size, snapshot.mtime_ns = st.st_size, st.st_mtime_ns
+        else:
+            with stats.phase("parse") if stats else nullcontext():
+                obj, err = parse_buffer(fname, buf)
+            if stats:
+                stats.add_bytes(len(buf))
+            if err:
+                return obj, err
+            snapshot = Snapshot(st.st_size, st.st_mtime_ns, content_digest, obj)
+        self.snapshots[fname] = snapshot
+        self._write(fname, snapshot)
+        return snapshot.obj, None
+
+    def digests(self, fname: str, obj: Any, config: OdiffConfig) -> DigestIndex:
+        """The digests of `obj`, restored if it was loaded from `fname`"""
+        from odiff.merkle import DigestIndex
+
+        snapshot: Optional[Snapshot] = self.snapshots.get(fname)
+        if snapshot is None or snapshot.obj is not obj:
+            return DigestIndex(obj, config)
+        key: ConfigKey = config_key(config)
+        ordered: Optional[List[bytes]] = snapshot.digests.get(key)
+        if ordered is not None:
+            try:
+                return DigestIndex(obj, config, ordered)
+            except StopIteration:
+                log.debug(f"Discarding mismatched digests ({fname})")
+        index: DigestIndex = DigestIndex(obj, config)
+        snapshot.digests[key] = index.ordered()
+        self._write(fname, snapshot)
+        return index
+
+    def _entry(self, fname: str) -> str:
+        name: str = blake2b(
+            os.path.realpath(fname).encode(), digest_size=16
+        ).hexdigest()
+        return os.path.join(self.directory, name + SNAPSHOT_SUFFIX)
+
+    def _read(self, fname: str) -> Optional[Snapshot]:
+        entry: str = self._entry(fname)
+        try:
+            with open(entry, "rb") as f:
+                snapshot: Any = pickle.load(f)
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.debug(f"Ignoring unreadable cache entry ({entry}): {e!r}")
+            return None
+        return snapshot if isinstance(snapshot, Snapshot) else None
+
+    def _write(self, fname: str, snapshot: Snapshot):
+        # Written whole then renamed so concurrent readers never see a part
+        from tempfile import NamedTemporaryFile
+
+        tmp: Optional[str] = None
+        try:
+            with NamedTemporaryFile(
+                "wb", dir=self.directory, suffix=".tmp", delete=False
+            ) as f:
+                tmp = f.name
+                pickle.dump(
+                    snapshot,
+                    _BoundedWriter(f, self.max_bytes),
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp, self._entry(fname))
+            self._evict()
+        except _TooLarge:
+            # It would evict every other snapshot, then itself
+            log.debug(f"Snapshot larger than the cache, not cached ({fname})")
+            if tmp:
+                os.remove(tmp)
+            self._remove(self._entry(fname))
+        except Exception as e:
+            log.debug(f"Failed to cache snapshot ({fname}): {e!r}")
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _evict(self):
+        stats: List[Tuple[os.stat_result, str]] = sorted(
+            (
+                (e.stat(), e.path)
+                for e in os.scandir(self.directory)
+                if e.name.endswith(SNAPSHOT_SUFFIX)
+            ),
+            key=lambda entry: entry[0].st_mtime_ns,
+        )
+        total: int = sum(st.st_size for st, _ in stats)
+        for st, path in stats:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= st.st_size
+
+    def _remove(self, entry: str):
+        try:
+            os.remove(entry)
+        except FileNotFoundError:
+            pass
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _BoundedWriter:
+    """Writes to a file until more than `limit` bytes would be written, so a
+    pickle too large to cache is abandoned rather than written whole"""
+
+    def __init__(self, f: IO[bytes], limit: int):
+        self.f: IO[bytes] = f
+        self.remaining: int = limit
+
+    def write(self, b: bytes) -> int:
+        self.remaining -= len(b)
+        if self.remaining < 0:
+            raise _TooLarge
+        return self.f.write(b)
+
+
+def open_cache(options: CacheOptions) -> Optional[SnapshotCache]:
+    """Open the cache if enabled, without failing the diff if it cannot be"""
+    if not options.enabled:
+        return None
+    try:
+        return SnapshotCache(options)
+    except OSError as e:
+        log.warning(f"Snapshot cache disabled: {e}")
+        return None
+
+
+def _content_digest(buf: bytes) -> bytes:
+    return blake2b(buf, digest_size=16).digest()
@@ -1,31 +1,60 @@
 import sys
 from argparse import ArgumentParser, ArgumentTypeError
+from dataclasses import asdict
 from logging import INFO, Logger, getLevelName
-from os import access, R_OK
-from os.path import isfile
-from typing import List
-
-from dacite import DaciteError, from_dict
+from os import R_OK, access
+from os.path import isdir, isfile
+from typing import Any, Dict, List, NoReturn, Tuple
 
 from odiff.logger import VALID_LOG_LEVELS, get_logger
-from odiff.options import CliOptions, OdiffConfig, OutputType
-from odiff.util import read_yaml_file
+from odiff.options import (
+    CacheOptions,
+    CliOptions,
+    OdiffConfig,
+    OutputType,
+    SummaryOptions,
+    TableOptions,
+    Tolerance,
+    UnifiedDiffOptions,
+)
+from odiff.util import ExitCode, read_yaml_file
 
 log: Logger = get_logger("cli")
 
 
 def config_from_fname(fname: str) -> OdiffConfig:
+    from dacite import Config, DaciteError, from_dict
+
     obj, err = read_yaml_file(fname)
     if err:
         raise ArgumentTypeError(f"Filed to read config file: {fname})")
     try:
+        # Tolerances may be written as ints, or as exponents which YAML 1.1
+        #  reads as strings
         return from_dict(
-            OdiffConfig, {k.replace("-", "_"): v for k, v in obj.items()}
+            OdiffConfig,
+            {k.replace("-", "_"): v for k, v in obj.items()},
+            Config(cast=[float]),
         )
     except DaciteError as e:
         raise ArgumentTypeError(e)
 
 
+def config_to_fname(config: OdiffConfig, fname: str):
+    """Write `config` to a YAML file readable by :func:`config_from_fname`,
+    omitting default settings"""
+    import yaml
+
+    defaults: Dict[str, Any] = asdict(OdiffConfig())
+    obj: Dict[str, Any] = {
+        k.replace("_", "-"): v
+        for k, v in asdict(config).items()
+        if v != defaults[k]
+    }
+    with open(fname, "w") as f:
+        yaml.safe_dump(obj, f, sort_keys=False)
+
+
 def parse(argv: List[str]) -> CliOptions:
     parser = ArgumentParser()
 
@@ -89,6 +118,254 @@ def parse(argv: List[str]) -> CliOptions:
         help="display raw objects instead of unified diff",
     )
 
+    parser.add_argument(
+        "--stream",
+        required=False,
+        action="store_true",
+        default=False,
+        help="stream top-level JSON arrays keyed by the list index for '.'",
+    )
+
+    parser.add_argument(
+        "--documents",
+        required=False,
+        action="store_true",
+        default=False,
+        help="diff multi-document YAML files document by document",
+    )
+
+    parser.add_argument(
+        "--document-key",
+        required=False,
+        action="append",
+        default=[],
+        help="path identifying documents, pairing them rather than position",
+    )
+
+    parser.add_argument(
+        "--merkle",
+        required=False,
+        action="store_true",
+        default=False,
+        help="digest both objects first to skip identical subtrees",
+    )
+
+    def positive_int(s: str) -> int:
+        if not s.isdigit() or int(s) < 1:
+            raise ArgumentTypeError(f"Not a positive integer: {s}")
+        return int(s)
+
+    def non_negative_int(s: str) -> int:
+        if not s.isdigit():
+            raise ArgumentTypeError(f"Not a non-negative integer: {s}")
+        return int(s)
+
+    parser.add_argument(
+        "--cache",
+        required=False,
+        action="store_true",
+        default=False,
+        help="read and write snapshots of parsed input files",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        required=False,
+        type=str,
+        default=None,
+        help="directory of the snapshot cache, implying --cache, defaults to"
+        " ~/.cache/odiff",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        required=False,
+        type=positive_int,
+        default=CacheOptions.max_bytes >> 20,
+        help="megabytes beyond which least recently used snapshots are evicted",
+    )
+
+    parser.add_argument(
+        "--watch",
+        "-w",
+        required=False,
+        action="store_true",
+        default=False,
+        help="re-diff whenever either file changes, until interrupted",
+    )
+
+    parser.add_argument(
+        "--watch-delta",
+        required=False,
+        action="store_true",
+        default=False,
+        help="when watching, report only new and resolved discrepancies",
+    )
+
+    def positive_float(s: str) -> float:
+        try:
+            f = float(s)
+        except ValueError:
+            f = 0
+        if not f > 0:
+            raise ArgumentTypeError(f"Not a positive number: {s}")
+        return f
+
+    parser.add_argument(
+        "--watch-interval",
+        required=False,
+        type=positive_float,
+        default=CliOptions.watch_interval,
+        help="seconds between polls of the watched files",
+    )
+
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        required=False,
+        action="store_true",
+        default=False,
+        help=(
+            "write nothing, stop at the first discrepancy, and exit with "
+            f"{ExitCode.DISCREPANCIES:d} if there is one"
+        ),
+    )
+
+    parser.add_argument(
+        "--max-discrepancies",
+        required=False,
+        type=positive_int,
+        default=None,
+        help="stop after this many discrepancies (per pair in batch modes)",
+    )
+
+    parser.add_argument(
+        "--stats",
+        required=False,
+        action="store_true",
+        default=False,
+        help="print counters and phase timings to stderr",
+    )
+
+    parser.add_argument(
+        "--timings",
+        required=False,
+        action="store_true",
+        default=False,
+        help="print phase timings to stderr",
+    )
+
+    parser.add_argument(
+        "--profile",
+        required=False,
+        type=str,
+        default=None,
+        help="run under cProfile, dumping the stats to this file",
+    )
+
+    parser.add_argument(
+        "--diff-context",
+        required=False,
+        type=non_negative_int,
+        default=UnifiedDiffOptions.context,
+        help="lines of context in unified diffs",
+    )
+
+    parser.add_argument(
+        "--diff-max-lines",
+        required=False,
+        type=positive_int,
+        default=None,
+        help="truncate each side of a unified diff to this many lines",
+    )
+
+    parser.add_argument(
+        "--page-size",
+        required=False,
+        type=positive_int,
+        default=TableOptions.page_size,
+        help="rows of table output per page, longer tables are paged",
+    )
+
+    parser.add_argument(
+        "--table-limit",
+        required=False,
+        type=positive_int,
+        default=None,
+        help="rows of table output after which the rest are only counted",
+    )
+
+    parser.add_argument(
+        "--summary-top",
+        required=False,
+        type=positive_int,
+        default=None,
+        help="busiest paths listed by summary output, all if not given",
+    )
+
+    parser.add_argument(
+        "--ordered-list",
+        required=False,
+        action="append",
+        type=str,
+        default=[],
+        help="paths of unkeyed lists to align in order, not in config",
+    )
+
+    parser.add_argument(
+        "--ordered",
+        required=False,
+        action="store_true",
+        default=False,
+        help="align every unkeyed list in order rather than as a multiset",
+    )
+
+    def path_tolerance(s: str) -> Tuple[str, float]:
+        path, _, tolerance = contains_colon(s).partition(":")
+        try:
+            f = float(tolerance)
+        except ValueError:
+            f = -1
+        if not f >= 0:
+            raise ArgumentTypeError(f"Not a non-negative tolerance: {s}")
+        return path.strip(), f
+
+    parser.add_argument(
+        "--tolerance",
+        "--tol",
+        required=False,
+        action="append",
+        type=path_tolerance,
+        default=[],
+        help="absolute tolerances of numbers by path, not in config",
+    )
+
+    parser.add_argument(
+        "--rel-tolerance",
+        "--rtol",
+        required=False,
+        action="append",
+        type=path_tolerance,
+        default=[],
+        help="relative tolerances of numbers by path, not in config",
+    )
+
+    parser.add_argument(
+        "--infer-list-indices",
+        required=False,
+        action="store_true",
+        default=False,
+        help="infer list indices for lists of objects not in config",
+    )
+
+    parser.add_argument(
+        "--emit-config",
+        required=False,
+        type=str,
+        default=None,
+        help="write the config, with any inferred list indices, to this file",
+    )
+
     parser.add_argument(
         "--exclusion",
         "--exc",
@@ -99,20 +376,110 @@ def parse(argv: List[str]) -> CliOptions:
         help="exclusions not in config",
     )
 
+    parser.add_argument(
+        "--exclusion-log-limit",
+        required=False,
+        type=non_negative_int,
+        default=None,
+        help="excluded discrepancies logged per exclusion, beyond which they"
+        " are counted, and logged only at DEBUG",
+    )
+
+    batch = parser.add_mutually_exclusive_group()
+    batch.add_argument(
+        "--batch",
+        required=False,
+        action="store_true",
+        default=False,
+        help="diff two directories, pairing files by relative path",
+    )
+    batch.add_argument(
+        "--manifest",
+        required=False,
+        type=valid_file,
+        help="diff each pair of files listed in this file, one per line",
+    )
+    batch.add_argument(
+        "--baseline",
+        required=False,
+        type=valid_file,
+        help="diff this file against each of the positional files",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-j",
+        required=False,
+        type=positive_int,
+        default=None,
+        help="processes used in batch and document modes, defaults to the"
+        " CPU count",
+    )
+
     parser.add_argument(
         "files",
         nargs="*",
-        type=valid_file,
-        help="two files to diff",
+        type=str,
+        help="two files to diff, or directories/files in batch modes",
     )
 
     parsed = parser.parse_args(argv)
 
-    if len(parsed.files) != 2:
+    def usage_error(msg: str) -> NoReturn:
         parser.print_usage(file=sys.stderr)
-        print("Invalid number of positionals (expected two)", file=sys.stderr)
+        print(msg, file=sys.stderr)
         exit(1)
 
+    def validate(valid, fnames: List[str]) -> List[str]:
+        try:
+            return [valid(fname) for fname in fnames]
+        except ArgumentTypeError as e:
+            usage_error(str(e))
+
+    def valid_dir(dname: str) -> str:
+        if isdir(dname) and access(dname, R_OK):
+            return dname
+        raise ArgumentTypeError(f"Directory ({dname}) not readable")
+
+    is_batch: bool = bool(parsed.batch or parsed.manifest or parsed.baseline)
+    if is_batch and parsed.stream:
+        usage_error("Streaming is not supported in batch modes")
+    if parsed.documents and (is_batch or parsed.stream):
+        usage_error("Documents are not supported in batch or streaming modes")
+    if parsed.watch and (is_batch or parsed.stream or parsed.documents):
+        usage_error(
+            "Watching is not supported in batch, streaming, or document modes"
+        )
+    if parsed.watch and (parsed.quiet or parsed.max_discrepancies):
+        usage_error("Quiet and capped output are not supported when watching")
+    if (parsed.infer_list_indices or parsed.emit_config) and (
+        is_batch or parsed.stream or parsed.watch or parsed.documents
+    ):
+        usage_error(
+            "Inferring and emitting config are not supported in batch, "
+            "streaming, watch, or document modes"
+        )
+    if parsed.output_type == OutputType.JSON_PATCH and (
+        is_batch or parsed.stream or parsed.watch or parsed.documents
+    ):
+        usage_error(
+            "JSON Patch output is not supported in batch, streaming, watch, "
+            "or document modes"
+        )
+    if parsed.output_type == OutputType.JSON_PATCH and parsed.max_discrepancies:
+        usage_error("JSON Patch output cannot be capped")
+    if parsed.manifest:
+        if parsed.files:
+            usage_error("Unexpected positionals with a manifest")
+    elif parsed.baseline:
+        if not parsed.files:
+            usage_error("Invalid number of positionals (expected at least one)")
+        validate(valid_file, parsed.files)
+    elif len(parsed.files) != 2:
+        usage_error("Invalid number of positionals (expected two)")
+    else:
+        validate(valid_dir if parsed.batch else valid_file, parsed.files)
+
     config = parsed.config if parsed.config else OdiffConfig()
 
     for e in parsed.list_index:
@@ -123,11 +490,59 @@ def parse(argv: List[str]) -> CliOptions:
     for e in parsed.exclusion:
         config.exclusions.append(e)
 
+    if parsed.exclusion_log_limit is not None:
+        config.exclusion_log_limit = parsed.exclusion_log_limit
+
+    for o in parsed.ordered_list:
+        config.ordered_lists.append(o)
+
+    if parsed.ordered:
+        config.ordered = True
+
+    for k in parsed.document_key:
+        config.document_keys.append(k)
+
+    for path, absolute in parsed.tolerance:
+        config.tolerances.setdefault(path, Tolerance()).absolute = absolute
+
+    for path, relative in parsed.rel_tolerance:
+        config.tolerances.setdefault(path, Tolerance()).relative = relative
+
     return CliOptions(
         output_type=parsed.output_type,
         config=config,
         raw=parsed.raw,
-        lfname=parsed.files[0],
-        rfname=parsed.files[1],
+        stream=parsed.stream,
+        documents=parsed.documents,
+        merkle=parsed.merkle,
+        lfname=parsed.files[0] if not is_batch else "",
+        rfname=parsed.files[1] if not is_batch else "",
+        files=parsed.files if is_batch else [],
+        batch=parsed.batch,
+        manifest=parsed.manifest,
+        baseline=parsed.baseline,
+        workers=parsed.workers,
+        watch=parsed.watch,
+        watch_delta=parsed.watch_delta,
+        watch_interval=parsed.watch_interval,
+        stats=parsed.stats,
+        timings=parsed.timings,
+        profile=parsed.profile,
+        quiet=parsed.quiet,
+        max_discrepancies=parsed.max_discrepancies,
+        infer_list_indices=parsed.infer_list_indices,
+        emit_config=parsed.emit_config,
         log_level=parsed.log_level,
+        unified_diff=UnifiedDiffOptions(
+            context=parsed.diff_context, max_lines=parsed.diff_max_lines
+        ),
+        table=TableOptions(
+            page_size=parsed.page_size, limit=parsed.table_limit
+        ),
+        summary=SummaryOptions(top=parsed.summary_top),
+        cache=CacheOptions(
+            enabled=parsed.cache or parsed.cache_dir is not None,
+            directory=parsed.cache_dir,
+            max_bytes=parsed.cache_size << 20,
+        ),
     )
@@ -0,0 +1,113 @@
+import json
+import os
+import socket
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from typing import Any, Dict, List
+
+# Imports nothing else of the package, so a request costs little more than
+#  starting Python; the server does the parsing and diffing
+
+# Exit code when the server cannot be reached, as `ExitCode.FILE_IO`
+UNREACHABLE = 3
+
+
+def default_socket_path() -> str:
+    """The socket in the user's runtime directory, else in the temporary"""
+    runtime: str = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime, f"odiff-{os.getuid()}.sock")
+
+
+def _contains_colon(s: str) -> str:
+    if ":" not in s:
+        raise ArgumentTypeError(f"Colon not in value: {s}")
+    return s
+
+
+def request(socket_path: str, req: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one request to an `odiff serve` server and await its response
+
+    :param socket_path: str, the server's Unix domain socket
+    :param req: Dict[str, Any], the request, see
+        :func:`odiff.serve.handle_request`
+
+    :return: The response, with a "status" and the "output" or an "error"
+    :rtype: Dict[str, Any]
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(req).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as f:
+            line: bytes = f.readline()
+    if not line:
+        raise ConnectionError("Server closed the connection without a response")
+    return json.loads(line)
+
+
+def main(argv: List[str]) -> int:
+    parser = ArgumentParser(prog="odiff client")
+    parser.add_argument(
+        "--socket",
+        "-s",
+        required=False,
+        default=default_socket_path(),
+        help="socket of the server",
+    )
+    parser.add_argument(
+        "--config", "-c", required=False, help="yaml config file"
+    )
+    parser.add_argument(
+        "--output-type", "--output", "-o", required=False, default="table"
+    )
+    parser.add_argument(
+        "--list-index",
+        "--li",
+        required=False,
+        action="append",
+        type=_contains_colon,
+        default=[],
+        help="list indices not in config",
+    )
+    parser.add_argument(
+        "--exclusion",
+        "--exc",
+        required=False,
+        action="append",
+        default=[],
+        help="exclusions not in config",
+    )
+    parser.add_argument("--raw", "-r", required=False, action="store_true")
+    parser.add_argument("--quiet", "-q", required=False, action="store_true")
+    parser.add_argument("--max-discrepancies", required=False, type=int)
+    parser.add_argument("files", nargs=2, help="two files to diff")
+    parsed = parser.parse_args(argv)
+
+    # The server resolves paths against its own directory, not ours
+    req: Dict[str, Any] = {
+        "left": os.path.abspath(parsed.files[0]),
+        "right": os.path.abspath(parsed.files[1]),
+        "config": parsed.config and os.path.abspath(parsed.config),
+        "list_indices": dict(
+            (k.strip(), v.strip())
+            for k, v in (e.split(":", maxsplit=1) for e in parsed.list_index)
+        ),
+        "exclusions": parsed.exclusion,
+        "output": parsed.output_type,
+        "raw": parsed.raw,
+        "quiet": parsed.quiet,
+        "max_discrepancies": parsed.max_discrepancies,
+    }
+    try:
+        response: Dict[str, Any] = request(parsed.socket, req)
+    except (OSError, ValueError) as e:
+        print(f"Failed to reach server ({parsed.socket}): {e}", file=sys.stderr)
+        return UNREACHABLE
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+    sys.stdout.write(response.get("output", ""))
+    return response["status"]
+
+
+if __name__ == "__main__":
+    exit(main(sys.argv[1:]))
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from difflib import unified_diff
-from enum import StrEnum
 import json
+import pickle
 import re
-from typing import Any, List
+import sys
+from array import array
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from odiff.options import UnifiedDiffOptions
 from odiff.util import (
-    RAW_OBJECT_COLUMN_MAX_W,
     PATH_COLUMN_MAX_W,
+    RAW_OBJECT_COLUMN_MAX_W,
     TRUNC_MAX,
     multiline_aware_wrap,
     trunc,
@@ -24,21 +27,33 @@ class Variant(StrEnum):
     MOD = "modification"
 
 
-@dataclass()
+VARIANTS: List[Variant] = list(Variant)
+
+
+@dataclass(slots=True)
 class Discrepancy:
     """Structure for a found discrepancy between object
 
+    Slotted, as diffs may produce millions of them, see
+     :class:`DiscrepancyTable` for more compact storage still
+
     :param variant: :class:`odiff.main.Variant`, the type of discrepancy
     :param path: str, the path through the objects being compared (JQ-ish)
     :param lvalue: `typing.Any`, the value if found in the first object
     :param rvalue: `typing.Any`, the value if found in the second object
+    :param lfname: str, name of the first object's file for the unified diff
+    :param rfname: str, name of the second object's file for the unified diff
     """
 
     variant: Variant
     path: str
     lvalue: Any
     rvalue: Any
-    unified_diff: str = ""
+    lfname: str = field(default="", repr=False, compare=False)
+    rfname: str = field(default="", repr=False, compare=False)
+    _unified_diff: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __str__(self) -> str:
         s: str = f"{self.variant} @ .{self.path} : "
@@ -68,7 +83,18 @@ class Discrepancy:
             width=RAW_OBJECT_COLUMN_MAX_W,
         )
 
-    def for_tabulation(self, raw: bool) -> List[str | Any]:
+    def to_dict(self) -> Dict[str, Any]:
+        """The Discrepancy as a JSON-serializable dictionary"""
+        return {
+            "variant": self.variant,
+            "path": self.path,
+            "lvalue": self.lvalue,
+            "rvalue": self.rvalue,
+        }
+
+    def for_tabulation(
+        self, raw: bool, options: Optional[UnifiedDiffOptions] = None
+    ) -> List[str | Any]:
         """Format the Discrepancy for tabulation"""
         width_path: str = re.sub(r"\[([^\]]{5,})\]", r"[\n  \1\n]", self.path)
         table: List[str] = [
@@ -85,21 +111,45 @@ class Discrepancy:
                 ]
             )
         else:
+            diff: str = (
+                self.unified_diff
+                if options is None
+                else self.build_unified_diff(self.lfname, self.rfname, options)
+            )
             table.append(
                 multiline_aware_wrap(
-                    self.unified_diff,
+                    diff,
                     indent_wrapped=True,
                     width=RAW_OBJECT_COLUMN_MAX_W * 2,
                 )
             )
         return table
 
-    def build_unified_diff(self, lfname: str = "", rfname: str = ""):
-        larr: List[str] = json.dumps(self.lvalue, indent=2).splitlines(True)
-        rarr: List[str] = json.dumps(self.rvalue, indent=2).splitlines(True)
-        self.unified_diff = "".join(
-            unified_diff(larr, rarr, fromfile=lfname, tofile=rfname, n=10)
+    @property
+    def unified_diff(self) -> str:
+        """Unified diff of the values, built on first access"""
+        if self._unified_diff is None:
+            return self.build_unified_diff(self.lfname, self.rfname)
+        return self._unified_diff
+
+    def build_unified_diff(
+        self,
+        lfname: str = "",
+        rfname: str = "",
+        options: Optional[UnifiedDiffOptions] = None,
+    ) -> str:
+        """Build, cache, and return the unified diff of the values"""
+        from difflib import unified_diff
+
+        options = options or UnifiedDiffOptions()
+        larr: List[str] = _diff_lines(self.lvalue, options.max_lines)
+        rarr: List[str] = _diff_lines(self.rvalue, options.max_lines)
+        self._unified_diff = "".join(
+            unified_diff(
+                larr, rarr, fromfile=lfname, tofile=rfname, n=options.context
+            )
         )
+        return self._unified_diff
 
     @staticmethod
     def tabulation_headers(raw: bool) -> List[str]:
@@ -124,4 +174,219 @@ class Discrepancy:
         return Discrepancy(Variant.MOD, path, lvalue, rvalue)
 
 
+def _diff_lines(value: Any, max_lines: Optional[int]) -> List[str]:
+    lines: List[str] = json.dumps(value, indent=2).splitlines(True)
+    if max_lines is None or len(lines) <= max_lines:
+        return lines
+    return lines[:max_lines] + [f"... {len(lines) - max_lines} more lines\n"]
+
+
 type Discrepancies = List[Discrepancy]
+
+ROOT = -1
+
+_PIECE_RE = re.compile(r"(?=[.\[])")
+
+
+def _pieces(path: str) -> List[str]:
+    # Split before each `.` or `[`, so joining the pieces restores the path
+    #  exactly, whatever the keys contain
+    return [piece for piece in _PIECE_RE.split(path) if piece]
+
+
+class PathPool:
+    """Prefix tree of rendered paths, each node stored as its parent and last
+    piece
+
+    Paths are added in the order the diff yields them, so each shares the
+     nodes of the prefix it has in common with the one added before it
+     without a lookup of every node; paths are identified by their last node,
+     the empty path by :data:`ROOT`
+    """
+
+    __slots__ = ("parents", "pieces", "_last")
+
+    def __init__(self):
+        self.parents: array = array("q")
+        self.pieces: List[str] = []
+        self._last: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.pieces)
+
+    def intern(self, path: str) -> int:
+        """The node of `path`, adding any of it not shared with the last"""
+        pieces: List[str] = _pieces(path)
+        last: List[Tuple[str, int]] = self._last
+        n: int = 0
+        while n < len(pieces) and n < len(last) and last[n][0] == pieces[n]:
+            n += 1
+        node: int = last[n - 1][1] if n else ROOT
+        del last[n:]
+        for piece in pieces[n:]:
+            self.parents.append(node)
+            self.pieces.append(sys.intern(piece))
+            node = len(self.pieces) - 1
+            last.append((piece, node))
+        return node
+
+    def render(self, node: int) -> str:
+        """The path of `node`"""
+        pieces: List[str] = []
+        while node != ROOT:
+            pieces.append(self.pieces[node])
+            node = self.parents[node]
+        return "".join(reversed(pieces))
+
+    def beneath(self, prefix: str) -> bytearray:
+        """Flags of the nodes whose path is, or is beneath, `prefix`"""
+        target: List[str] = _pieces(prefix)
+        # Pieces of `target` matched by the path of each node, -1 if none
+        matched: array = array("q")
+        flags: bytearray = bytearray(len(self.pieces))
+        for node, parent in enumerate(self.parents):
+            m: int = 0 if parent == ROOT else matched[parent]
+            if 0 <= m < len(target):
+                m = m + 1 if self.pieces[node] == target[m] else -1
+            matched.append(m)
+            flags[node] = m == len(target)
+        return flags
+
+
+class DiscrepancyTable:
+    """Columnar storage of discrepancies, for diffs too large to hold as a
+    list of :class:`Discrepancy`
+
+    Variants are stored as small ints, paths as nodes of a :class:`PathPool`
+     shared with any table filtered from this one, and values either by
+     reference or, if `serialize`, pickled so the documents diffed can be
+     freed; records are built again as they are iterated
+
+    :param serialize: bool, whether to pickle values rather than hold them
+    :param pool: Optional[PathPool], pool of paths to share
+    """
+
+    __slots__ = (
+        "serialize",
+        "pool",
+        "variants",
+        "paths",
+        "lvalues",
+        "rvalues",
+        "fnames",
+        "fname_ids",
+        "_fname_index",
+    )
+
+    def __init__(
+        self, serialize: bool = False, pool: Optional[PathPool] = None
+    ):
+        self.serialize: bool = serialize
+        self.pool: PathPool = pool if pool is not None else PathPool()
+        self.variants: array = array("B")
+        self.paths: array = array("q")
+        self.lvalues: List[Any] = []
+        self.rvalues: List[Any] = []
+        self.fnames: List[Tuple[str, str]] = []
+        self.fname_ids: array = array("I")
+        self._fname_index: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.variants)
+
+    def __iter__(self) -> Iterator[Discrepancy]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> Discrepancy:
+        lfname, rfname = self.fnames[self.fname_ids[i]]
+        return Discrepancy(
+            VARIANTS[self.variants[i]],
+            self.pool.render(self.paths[i]),
+            self._load(self.lvalues[i]),
+            self._load(self.rvalues[i]),
+            lfname,
+            rfname,
+        )
+
+    def append(self, d: Discrepancy):
+        self._append(
+            VARIANTS.index(d.variant),
+            self.pool.intern(d.path),
+            self._dump(d.lvalue),
+            self._dump(d.rvalue),
+            (d.lfname, d.rfname),
+        )
+
+    def extend(self, discrepancies: Iterable[Discrepancy]):
+        for d in discrepancies:
+            self.append(d)
+
+    def filter(
+        self,
+        variants: Optional[Iterable[Variant]] = None,
+        prefix: Optional[str] = None,
+    ) -> DiscrepancyTable:
+        """A table of the discrepancies of any of `variants` beneath the path
+        `prefix`, sharing this table's pool and values
+
+        :param variants: Optional[Iterable[Variant]], variants to keep, all if
+            None
+        :param prefix: Optional[str], path, sans leading `.`, at or beneath
+            which to keep discrepancies, all if None
+        """
+        table: DiscrepancyTable = DiscrepancyTable(self.serialize, self.pool)
+        codes: Optional[Set[int]] = (
+            None if variants is None else {VARIANTS.index(v) for v in variants}
+        )
+        flags: Optional[bytearray] = (
+            None if prefix is None else self.pool.beneath(prefix)
+        )
+        for i in range(len(self)):
+            if codes is not None and self.variants[i] not in codes:
+                continue
+            node: int = self.paths[i]
+            if flags is not None and not (
+                flags[node] if node != ROOT else prefix == ""
+            ):
+                continue
+            table._append(
+                self.variants[i],
+                node,
+                self.lvalues[i],
+                self.rvalues[i],
+                self.fnames[self.fname_ids[i]],
+            )
+        return table
+
+    def to_list(self) -> Discrepancies:
+        """The discrepancies as a list, as returned by :func:`odiff.odiff`"""
+        return list(self)
+
+    def _append(
+        self,
+        variant: int,
+        node: int,
+        lvalue: Any,
+        rvalue: Any,
+        fnames: Tuple[str, str],
+    ):
+        fname_id: Optional[int] = self._fname_index.get(fnames)
+        if fname_id is None:
+            fname_id = self._fname_index[fnames] = len(self.fnames)
+            self.fnames.append(fnames)
+        self.variants.append(variant)
+        self.paths.append(node)
+        self.lvalues.append(lvalue)
+        self.rvalues.append(rvalue)
+        self.fname_ids.append(fname_id)
+
+    def _dump(self, value: Any) -> Any:
+        if not self.serialize or value is None:
+            return value
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _load(self, value: Any) -> Any:
+        if not self.serialize or value is None:
+            return value
+        return pickle.loads(value)
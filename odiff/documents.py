@@ -0,0 +1,201 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from odiff.discrepancy import Discrepancy, DiscrepancyTable
+from odiff.loader import read_buffer
+from odiff.odiff import iter_odiff
+from odiff.options import OdiffConfig
+from odiff.path import Index
+from odiff.stats import Stats
+
+# Documents below which they are diffed in this process, as sending them to
+#  workers costs more than diffing them
+PARALLEL_MIN_DOCUMENTS = 32
+
+
+@dataclass
+class DocumentPair:
+    """Two documents to diff, either of which may be missing
+
+    :param name: str, the identity of the documents, or their position
+    :param lobj: Any, the "left" document, None if missing
+    :param robj: Any, the "right" document, None if missing
+    """
+
+    name: str
+    lobj: Any = None
+    robj: Any = None
+
+
+def iter_documents(fname: str) -> Iterator[Any]:
+    """Parse the documents of a YAML stream, separated by `---`, one at a
+    time; empty documents are skipped, so None is never a document
+
+    :raises ValueError: If the stream is not valid YAML
+    """
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        for document in yaml.load_all(read_buffer(fname), Loader=loader):
+            if document is not None:
+                yield document
+    except yaml.YAMLError as e:
+        raise ValueError(f"Failed to parse documents of ({fname}): {e}")
+
+
+def document_identity(document: Any, keys: List[str]) -> Optional[str]:
+    """The values of the dotted `keys` of a document joined by `/`, empty
+    for any missing, e.g. `Deployment/default/web`; None if it has none"""
+    values: List[str] = []
+    for key in keys:
+        value: Any = document
+        for part in key.strip(".").split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        values.append("" if value is None else str(value))
+    return "/".join(values) if any(values) else None
+
+
+def pair_documents(
+    ldocs: List[Any], rdocs: List[Any], keys: List[str]
+) -> List[DocumentPair]:
+    """Pair the documents of two streams by identity, or by position without
+    `keys`; those without an identity, and repeats of one, are named by it
+    and their position"""
+    if not keys:
+        n: int = max(len(ldocs), len(rdocs))
+        pairs: List[DocumentPair] = [DocumentPair(str(i)) for i in range(n)]
+        for pair, obj in zip(pairs, ldocs):
+            pair.lobj = obj
+        for pair, obj in zip(pairs, rdocs):
+            pair.robj = obj
+        return pairs
+    by_name: Dict[str, DocumentPair] = {}
+    for side, docs in enumerate((ldocs, rdocs)):
+        seen: Dict[str, int] = {}
+        for i, document in enumerate(docs):
+            name: str = document_identity(document, keys) or f"#{i}"
+            seen[name] = seen.get(name, 0) + 1
+            if seen[name] > 1:
+                name = f"{name}#{seen[name]}"
+            pair: DocumentPair = by_name.setdefault(name, DocumentPair(name))
+            if side == 0:
+                pair.lobj = document
+            else:
+                pair.robj = document
+    return list(by_name.values())
+
+
+def diff_document_pair(
+    pair: DocumentPair,
+    config: OdiffConfig,
+    lfname: str = "",
+    rfname: str = "",
+    limit: Optional[int] = None,
+    stats: Optional[Stats] = None,
+) -> DiscrepancyTable:
+    """Diff a pair of documents, a document missing from one side being a
+    single discrepancy of the whole of the other; paths are prefixed by the
+    name of the pair, and counters added to `stats` if given"""
+    table: DiscrepancyTable = DiscrepancyTable()
+    prefix: str = f"[{pair.name}]"
+    if pair.robj is None:
+        table.append(Discrepancy.add(prefix, pair.lobj))
+    elif pair.lobj is None:
+        table.append(Discrepancy.sub(prefix, pair.robj))
+    else:
+        for d in iter_odiff(
+            pair.lobj, pair.robj, config, stats=stats, limit=limit
+        ):
+            sep: str = "" if not d.path or d.path.startswith("[") else "."
+            d.path = f"{prefix}{sep}{d.path}"
+            table.append(d)
+    for d in table:
+        d.lfname, d.rfname = lfname, rfname
+    return table
+
+
+def iter_documents_odiff(
+    lfname: str,
+    rfname: str,
+    config: OdiffConfig,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    stats: Optional[Stats] = None,
+) -> Iterator[Discrepancy]:
+    """Diff two multi-document YAML files document by document
+
+    Documents are paired by the identity of `config.document_keys`, or by
+     position if there are none, and each pair is diffed independently
+     across a pool of processes, see :func:`diff_document_pair`
+
+    :param lfname: str, the "left" file
+    :param rfname: str, the "right" file
+    :param config: Configuration applied to each pair of documents
+    :param workers: Optional[int], number of processes, defaulting to the
+        number of CPUs; with one, or few documents, pairs are diffed in this
+        process
+    :param limit: Optional[int], number of discrepancies after which to stop
+    :param stats: Optional[Stats], counters to which to add those of each
+        pair, gathered in its process, with the paths of its lists prefixed
+        by its name
+
+    :return: Iterator of discrepancies, in the order of the pairs
+    :rtype: Iterator[Discrepancy]
+    """
+    ldocs: List[Any] = list(iter_documents(lfname))
+    rdocs: List[Any] = list(iter_documents(rfname))
+    pairs: List[DocumentPair] = pair_documents(
+        ldocs, rdocs, config.document_keys
+    )
+    fn = partial(
+        _diff_document_pair,
+        config=config,
+        lfname=lfname,
+        rfname=rfname,
+        limit=limit,
+        gather=stats is not None,
+    )
+    workers = workers or os.cpu_count() or 1
+    discrepancies: Iterator[Discrepancy] = (
+        d
+        for table in _merged(_map(fn, pairs, workers), pairs, stats)
+        for d in table
+    )
+    return islice(discrepancies, limit)
+
+
+def _diff_document_pair(
+    pair: DocumentPair, gather: bool, **kwargs
+) -> Tuple[DiscrepancyTable, Optional[Stats]]:
+    # Stats are gathered where the pair is diffed, and returned with it
+    stats: Optional[Stats] = Stats() if gather else None
+    return diff_document_pair(pair, stats=stats, **kwargs), stats
+
+
+def _merged(
+    results: Iterator[Tuple[DiscrepancyTable, Optional[Stats]]],
+    pairs: List[DocumentPair],
+    stats: Optional[Stats],
+) -> Iterator[DiscrepancyTable]:
+    for pair, (table, pair_stats) in zip(pairs, results):
+        if stats is not None and pair_stats is not None:
+            stats.merge(pair_stats, (Index(pair.name),))
+        yield table
+
+
+def _map(fn, pairs: List[DocumentPair], workers: int) -> Iterator[Any]:
+    if workers == 1 or len(pairs) < PARALLEL_MIN_DOCUMENTS:
+        yield from map(fn, pairs)
+        return
+    chunksize: int = max(1, len(pairs) // (workers * 4))
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        yield from executor.map(fn, pairs, chunksize=chunksize)
+    finally:
+        # Stopping early, as when capped, need not wait on the other pairs
+        executor.shutdown(cancel_futures=True)
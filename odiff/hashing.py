@@ -0,0 +1,92 @@
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+_DICT = "__odiff_dict__"
+_LIST = "__odiff_list__"
+
+
+def coerce_scalar(value: Any) -> Any:
+    """Apply the same float coercion as :func:`odiff.odiff.diff_values`"""
+    if type(value) is float:
+        return value
+    try:
+        return float(value)
+    except Exception:
+        return value
+
+
+def canonical(value: Any) -> Hashable:
+    """Build a hashable structural key for a value
+
+    Two values have equal keys exactly when they would compare equal after
+     float coercion of every scalar; dictionaries are order-insensitive, lists
+     are not
+
+    :param value: Any, the value for which to build the key
+
+    :return: A hashable key
+    :rtype: Hashable
+    """
+    if not isinstance(value, (dict, list)):
+        return coerce_scalar(value)
+    # Frames of the container, its key in the parent, its remaining items, and
+    #  the keys built for its items so far; walked without recursion
+    root: List[Tuple[Any, Hashable]] = []
+    stack: List[Tuple[Any, Any, Iterator, List]] = [
+        (value, None, _items(value), [])
+    ]
+    while stack:
+        container, key, items, built = stack[-1]
+        for k, v in items:
+            if isinstance(v, (dict, list)):
+                stack.append((v, k, _items(v), []))
+                break
+            built.append((k, coerce_scalar(v)))
+        else:
+            stack.pop()
+            parent = stack[-1][3] if stack else root
+            if isinstance(container, dict):
+                parent.append((key, (_DICT, frozenset(built))))
+            else:
+                parent.append((key, (_LIST, tuple(v for _, v in built))))
+    return root[0][1]
+
+
+def _items(container: Dict | List) -> Iterator[Tuple[Any, Any]]:
+    if isinstance(container, dict):
+        return iter(container.items())
+    return enumerate(container)
+
+
+def multiset_difference(
+    l1: List[Any], l2: List[Any]
+) -> Tuple[List[Any], List[Any]]:
+    """Counted difference of two lists compared by :func:`canonical` key
+
+    Duplicates are matched one-for-one so a value appearing twice in one list
+     and once in the other is reported once
+
+    :param l1: List[Any], the "left" list
+    :param l2: List[Any], the "right" list
+
+    :return: Elements of `l2` not in `l1` and elements of `l1` not in `l2`,
+        each in their original order
+    :rtype: Tuple[List[Any], List[Any]]
+    """
+    k1: List[Hashable] = [canonical(e) for e in l1]
+    k2: List[Hashable] = [canonical(e) for e in l2]
+    remaining: Counter = Counter(k1)
+    missing_in_l1: List[Any] = []
+    for e, k in zip(l2, k2):
+        if remaining[k] > 0:
+            remaining[k] -= 1
+        else:
+            missing_in_l1.append(e)
+    remaining = Counter(k2)
+    missing_in_l2: List[Any] = []
+    for e, k in zip(l1, k1):
+        if remaining[k] > 0:
+            remaining[k] -= 1
+        else:
+            missing_in_l2.append(e)
+    return missing_in_l1, missing_in_l2
@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from odiff.options import OdiffConfig
+from odiff.path import ELEMENTS, Path, PathMatcher, path_key, render_path
+from odiff.util import all_dicts
+
+# Keys preferred, in order, when several could index the same lists
+PREFERRED_KEYS: List[str] = ["id", "_id", "name", "key"]
+
+# Elements of the lists at each path, across both objects, sampled for keys
+INFER_SAMPLE = 1000
+
+
+@dataclass
+class _Candidates:
+    """Keys able to index every list sampled at one path
+
+    :param keys: Optional[Set[str]], keys present, hashable, and unique in
+        every list sampled, None until the first is
+    :param values: Dict[str, Tuple[Set[Hashable], Set[Hashable]]], values
+        sampled of each key in the left and right objects
+    :param sampled: int, elements sampled
+    """
+
+    keys: Optional[Set[str]] = None
+    values: Dict[str, Tuple[Set[Hashable], Set[Hashable]]] = field(
+        default_factory=dict
+    )
+    sampled: int = 0
+
+    def sample(self, lst: List[Dict[str, Any]], side: int):
+        keys: Set[str] = set(lst[0]) if self.keys is None else self.keys
+        for e in lst[1:]:
+            keys = keys.intersection(e)
+        for k in list(keys):
+            values: Set[Hashable] = {e[k] for e in lst if _indexable(e[k])}
+            if len(values) < len(lst):
+                keys.discard(k)
+                continue
+            self.values.setdefault(k, (set(), set()))[side].update(values)
+        self.keys = keys
+        self.sampled += len(lst)
+
+    def best(self) -> Optional[str]:
+        """The key most likely to identify elements: once lists of both
+        objects are sampled, one of the values found in both, then preferring
+        :data:`PREFERRED_KEYS`, the most values in both, and the name"""
+        if not self.keys:
+            return None
+        shared: Dict[str, int] = {
+            k: len(self.values[k][0] & self.values[k][1]) for k in self.keys
+        }
+        both: bool = any(self.values[k][0] for k in self.keys) and any(
+            self.values[k][1] for k in self.keys
+        )
+        keys: List[str] = [k for k in self.keys if shared[k] or not both]
+        if not keys:
+            return None
+        return min(
+            keys,
+            key=lambda k: (
+                PREFERRED_KEYS.index(k)
+                if k in PREFERRED_KEYS
+                else len(PREFERRED_KEYS),
+                -shared[k],
+                k,
+            ),
+        )
+
+
+def _indexable(v: Any) -> bool:
+    # Floats and booleans make for poor identifiers
+    return type(v) is str or type(v) is int
+
+
+def infer_list_indices(
+    lobj: Any, robj: Any, config: OdiffConfig, sample: int = INFER_SAMPLE
+) -> Dict[str, str]:
+    """Infer list indices for the lists of dictionaries of both objects
+
+    The lists at each path, with elements generalised to `[]`, are sampled
+     for a key present in every element, with a string or integer value
+     unique within each list; lists already indexed, ordered, or excluded by
+     `config` are left as they are
+
+    The key chosen for a path is then checked against every list there, not
+     just those sampled, and dropped if any element lacks it or shares its
+     value, as keyed elements with equal values would mask one another
+
+    :param lobj: Any, the "left" object
+    :param robj: Any, the "right" object
+    :param config: Configuration of the diff the indices are for
+    :param sample: int, elements of the lists at each path, across both
+        objects, to sample and descend into for candidate keys
+
+    :return: Map of paths, in the form of `config.list_indices`, to keys,
+        e.g. `.[].items` for the lists of elements of a top-level list
+    :rtype: Dict[str, str]
+    """
+    matcher: PathMatcher = PathMatcher.compile(config)
+    found: Dict[Path, _Candidates] = {}
+    # Elements descended into at each path, those beyond the sample are not
+    descended: Dict[Path, int] = {}
+    for side, obj in enumerate((lobj, robj)):
+        stack: List[Tuple[Any, Path, PathMatcher]] = [(obj, (), matcher)]
+        while stack:
+            v, path, node = stack.pop()
+            if node.excluded:
+                continue
+            if isinstance(v, dict):
+                stack.extend(
+                    ((sv, (*path, k), node.key(k)) for k, sv in v.items())
+                )
+                continue
+            if not isinstance(v, list):
+                continue
+            if (
+                v
+                and node.list_index is None
+                and not node.ordered
+                and all_dicts(v)
+            ):
+                candidates: _Candidates = found.setdefault(path, _Candidates())
+                if candidates.sampled < sample and candidates.keys != set():
+                    candidates.sample(v[: sample - candidates.sampled], side)
+            elements: List[Any] = v[: sample - descended.get(path, 0)]
+            descended[path] = descended.get(path, 0) + len(elements)
+            element: PathMatcher = node.element()
+            stack.extend(((e, (*path, ELEMENTS), element) for e in elements))
+    chosen: Dict[Path, str] = {
+        path: key
+        for path, candidates in found.items()
+        if (key := candidates.best()) is not None
+    }
+    rejected: Set[Path] = _unfit(chosen, (lobj, robj), matcher)
+    inferred: Dict[str, str] = {
+        path_key(render_path(path)): key
+        for path, key in chosen.items()
+        if path not in rejected
+    }
+    return dict(sorted(inferred.items()))
+
+
+def _unfit(
+    chosen: Dict[Path, str], objs: Tuple[Any, Any], matcher: PathMatcher
+) -> Set[Path]:
+    # Every list at the paths chosen is walked, descending only toward them
+    prefixes: Set[Path] = {p[:i] for p in chosen for i in range(len(p))}
+    rejected: Set[Path] = set()
+    for obj in objs:
+        stack: List[Tuple[Any, Path, PathMatcher]] = [(obj, (), matcher)]
+        while stack:
+            v, path, node = stack.pop()
+            if node.excluded:
+                continue
+            if isinstance(v, dict):
+                stack.extend(
+                    (sv, (*path, k), node.key(k))
+                    for k, sv in v.items()
+                    if (*path, k) in chosen or (*path, k) in prefixes
+                )
+                continue
+            if not isinstance(v, list):
+                continue
+            key: Optional[str] = chosen.get(path)
+            if key is not None and path not in rejected and all_dicts(v):
+                values: Set[Hashable] = {
+                    e[key] for e in v if key in e and _indexable(e[key])
+                }
+                if len(values) < len(v):
+                    rejected.add(path)
+            if (*path, ELEMENTS) in chosen or (*path, ELEMENTS) in prefixes:
+                element: PathMatcher = node.element()
+                stack.extend((e, (*path, ELEMENTS), element) for e in v)
+    return rejected
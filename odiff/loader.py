@@ -0,0 +1,97 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from os.path import splitext
+from typing import Any, Callable, List, Optional, Tuple
+
+from odiff.stats import Stats
+
+JSON_EXTENSIONS = (".json",)
+YAML_EXTENSIONS = (".yaml", ".yml")
+
+SNIFF_BYTES = 64
+
+type Parser = Callable[[bytes], Any]
+type Loaded = Tuple[Any, Optional[Exception]]
+
+
+def parse_json(buf: bytes) -> Any:
+    return json.loads(buf)
+
+
+def parse_yaml(buf: bytes) -> Any:
+    # Imported here, `yaml` is the slowest import of a run on JSON files
+    import yaml
+
+    return yaml.load(buf, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def is_yaml_error(e: Exception) -> bool:
+    """Whether `e` was raised by `yaml`, which is only imported once a YAML
+    parser has been attempted"""
+    yaml: Any = sys.modules.get("yaml")
+    return yaml is not None and isinstance(e, yaml.YAMLError)
+
+
+def looks_like_json(buf: bytes) -> bool:
+    """Whether the first non-whitespace byte opens a JSON object or array"""
+    head: bytes = buf[:SNIFF_BYTES].lstrip(b"\xef\xbb\xbf \t\r\n")
+    return head[:1] in (b"{", b"[")
+
+
+def parsers_for(fname: str, buf: bytes) -> List[Parser]:
+    """Parsers to attempt, in order, from the extension or the content"""
+    ext: str = splitext(fname)[1].lower()
+    if ext in JSON_EXTENSIONS:
+        return [parse_json, parse_yaml]
+    if ext in YAML_EXTENSIONS:
+        return [parse_yaml, parse_json]
+    if looks_like_json(buf):
+        return [parse_json, parse_yaml]
+    return [parse_yaml, parse_json]
+
+
+def read_buffer(fname: str) -> bytes:
+    with open(fname, "rb") as f:
+        return f.read()
+
+
+def parse_buffer(fname: str, buf: bytes) -> Loaded:
+    """Parse a file's content with each candidate parser in turn
+
+    :param fname: str, the name of the file, used to pick the parsers
+    :param buf: bytes, the whole content of the file
+
+    :return: The parsed object and no error, or the content as a string and
+        the error of the last parser
+    :rtype: Tuple[Any, Optional[Exception]]
+    """
+    err: Optional[Exception] = None
+    for parser in parsers_for(fname, buf):
+        try:
+            return parser(buf), None
+        except Exception as e:
+            if not isinstance(e, ValueError) and not is_yaml_error(e):
+                raise
+            err = e
+    return buf.decode(errors="replace"), err
+
+
+def load_file(fname: str, stats: Optional[Stats] = None) -> Loaded:
+    """Read a file exactly once and parse it"""
+    if stats is None:
+        return parse_buffer(fname, read_buffer(fname))
+    with stats.phase("parse"):
+        buf: bytes = read_buffer(fname)
+        stats.add_bytes(len(buf))
+        return parse_buffer(fname, buf)
+
+
+def load_files(
+    *fnames: str, load: Callable[[str], Loaded] = load_file
+) -> List[Loaded]:
+    """Load several files concurrently, results in the order given"""
+    if len(fnames) < 2:
+        return [load(fname) for fname in fnames]
+    with ThreadPoolExecutor(max_workers=len(fnames)) as executor:
+        return list(executor.map(load, fnames))
@@ -1,17 +1,28 @@
-from logging import INFO, Logger
+from logging import INFO, Formatter, Logger, LogRecord, StreamHandler, getLogger
+from typing import Optional
+
+LOG_FORMAT = "%(log_color)s[%(levelname).4s:%(name)s]%(reset)s %(message)s"
+
+
+class LazyColoredFormatter(Formatter):
+    """Formatter deferring the import of `colorlog` until the first record is
+    formatted, most runs log nothing"""
+
+    def __init__(self, fmt: str = LOG_FORMAT):
+        super().__init__()
+        self.colored_fmt: str = fmt
+        self.colored: Optional[Formatter] = None
+
+    def format(self, record: LogRecord) -> str:
+        if self.colored is None:
+            from colorlog import ColoredFormatter
+
+            self.colored = ColoredFormatter(self.colored_fmt)
+        return self.colored.format(record)
 
-from colorlog import (
-    ColoredFormatter,
-    StreamHandler,
-    getLogger,
-)
 
 G_HANDLER = StreamHandler()
-G_HANDLER.setFormatter(
-    ColoredFormatter(
-        "%(log_color)s[%(levelname).4s:%(name)s]%(reset)s %(message)s",
-    )
-)
+G_HANDLER.setFormatter(LazyColoredFormatter())
 
 
 VALID_LOG_LEVELS = [
@@ -1,17 +1,26 @@
-import json
 import sys
+from contextlib import nullcontext
+from functools import partial
+from io import StringIO
 from logging import Logger
-from pprint import pformat
-from typing import Any, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
-from tabulate import tabulate
-
-from odiff.cli import parse
+from odiff.cli import config_to_fname, parse
 from odiff.discrepancy import Discrepancies, Discrepancy
+from odiff.infer import infer_list_indices
+from odiff.loader import load_file, load_files
 from odiff.logger import get_logger, set_default_log_level
-from odiff.odiff import odiff
-from odiff.options import CliOptions, OutputType
-from odiff.util import ExitCode, read_object_file
+from odiff.odiff import iter_odiff
+from odiff.options import CliOptions, OutputType, UnifiedDiffOptions
+from odiff.stats import Stats, profiled
+from odiff.util import ExitCode
+from odiff.writers import SUMMARY_TYPES, DiscrepancyWriter, writer_for
+
+# Batch, stream, document, and watch modes, with their imports, are imported
+#  only when selected, keeping the start of a plain diff quick
+if TYPE_CHECKING:
+    from odiff.batch import BatchSummary, FilePair
+    from odiff.cache import SnapshotCache
 
 
 log: Logger = get_logger("main")
@@ -20,37 +29,245 @@ log: Logger = get_logger("main")
 def main(args: List[str] = []) -> ExitCode:
     """Application entrypoint if you wish to use this as a CLI"""
     args = args or sys.argv[1:]
+    if args[:1] == ["serve"]:
+        from odiff.serve import main as serve
+
+        return serve(args[1:])
+    if args[:1] == ["client"]:
+        from odiff.client import main as client
+
+        return ExitCode(client(args[1:]))
+    if args[:1] == ["apply"]:
+        from odiff.patch import main as apply
+
+        return apply(args[1:])
     opts: CliOptions = parse(args)
 
     set_default_log_level(opts.log_level)
     log.setLevel(opts.log_level)
+    # Excluded discrepancies beyond the limit are logged only at DEBUG
+    get_logger("odiff").setLevel(opts.log_level)
 
-    lobj, robj, status = read_object_files(opts)
-    if status != ExitCode.CLEAN:
-        return status
+    stats: Optional[Stats] = Stats() if opts.stats or opts.timings else None
+    if opts.profile:
+        status: ExitCode = profiled(opts.profile, run, opts, stats)
+    else:
+        status = run(opts, stats)
+    if stats is not None:
+        print(stats.report(timings_only=not opts.stats), file=sys.stderr)
+    return status
 
-    discrepancies: Discrepancies = odiff(
-        lobj, robj, opts.config, opts.lfname, opts.rfname
-    )
+
+def run(opts: CliOptions, stats: Optional[Stats] = None) -> ExitCode:
+    """Run the diff described by the options, adding to `stats` if given"""
+    if opts.batch or opts.manifest or opts.baseline:
+        return run_batch(opts, stats)
+
+    if opts.output_type in SUMMARY_TYPES and stats is None:
+        # Exclusions are counted by the walk, for the summary to report
+        stats = Stats()
+
+    if opts.watch:
+        from odiff.watch import WatchSession, watch
+
+        return watch(
+            WatchSession(opts.lfname, opts.rfname, opts.config),
+            opts.output_type,
+            sys.stdout,
+            opts.raw,
+            opts.unified_diff,
+            opts.watch_delta,
+            opts.watch_interval,
+        )
+
+    limit: Optional[int] = limit_of(opts)
+    # Diffed to one past the limit, so whether more exist is known
+    peek: Optional[int] = None if limit is None else limit + 1
+    if opts.stream:
+        if not opts.config.list_indices.get("."):
+            log.error("Streaming requires a list index for '.'")
+            return ExitCode.USER_FAULT
+        from odiff.stream import iter_stream_odiff
+
+        discrepancies: Iterator[Discrepancy] = iter_stream_odiff(
+            opts.lfname, opts.rfname, opts.config, limit=peek, stats=stats
+        )
+    elif opts.documents:
+        from odiff.documents import iter_documents_odiff
+
+        discrepancies = iter_documents_odiff(
+            opts.lfname,
+            opts.rfname,
+            opts.config,
+            opts.workers,
+            limit=peek,
+            stats=stats,
+        )
+    else:
+        cache: Optional[SnapshotCache] = None
+        if opts.cache.enabled:
+            from odiff.cache import open_cache
+
+            cache = open_cache(opts.cache)
+        lobj, robj, status = read_object_files(opts, cache, stats)
+        if status != ExitCode.CLEAN:
+            return status
+        status = configure(opts, lobj, robj, stats)
+        if status != ExitCode.CLEAN:
+            return status
+        if opts.output_type == OutputType.JSON_PATCH and not opts.quiet:
+            return run_patch(opts, lobj, robj, stats)
+        ldigests = rdigests = None
+        if opts.merkle and cache:
+            with stats.phase("digest") if stats else nullcontext():
+                ldigests = cache.digests(opts.lfname, lobj, opts.config)
+                rdigests = cache.digests(opts.rfname, robj, opts.config)
+        discrepancies = iter_odiff(
+            lobj,
+            robj,
+            opts.config,
+            opts.lfname,
+            opts.rfname,
+            merkle=opts.merkle,
+            ldigests=ldigests,
+            rdigests=rdigests,
+            stats=stats,
+            limit=peek,
+        )
+
+    if stats is not None:
+        discrepancies = stats.timed("diff", discrepancies)
 
     try:
-        print(format_discrepancies(opts.output_type, discrepancies, opts.raw))
+        if opts.quiet:
+            if next(discrepancies, None) is None:
+                return ExitCode.CLEAN
+            return ExitCode.DISCREPANCIES
+        writer: DiscrepancyWriter = writer_for(
+            opts.output_type,
+            sys.stdout,
+            opts.raw,
+            opts.unified_diff,
+            stats,
+            opts.table,
+            opts.summary,
+            limit,
+        )
+        count: int = writer.write_all(discrepancies)
+    except ValueError as e:
+        log.error(f"Failed to diff object files: {e}")
+        return ExitCode.USER_FAULT
     except Exception as e:
         print(repr(e))
         return ExitCode.INTERNAL_FAULT
 
+    if writer.truncated:
+        log.warning(
+            f"Output truncated at {count} discrepancies, more exist"
+            " (--max-discrepancies)"
+        )
     return ExitCode.CLEAN
 
 
-def read_object_files(opts: CliOptions) -> Tuple[Any, Any, ExitCode]:
-    lobj, err = read_object_file(opts.lfname)
-    if err:
+def configure(
+    opts: CliOptions, lobj: Any, robj: Any, stats: Optional[Stats] = None
+) -> ExitCode:
+    """Add any list indices inferred from the objects to the config, and
+    write it out if requested"""
+    if opts.infer_list_indices:
+        with stats.phase("infer") if stats else nullcontext():
+            inferred: Dict[str, str] = infer_list_indices(
+                lobj, robj, opts.config
+            )
+        for path, key in inferred.items():
+            log.info(f"Inferred list index '{key}' for '{path}'")
+        opts.config.list_indices.update(inferred)
+    if opts.emit_config:
+        try:
+            config_to_fname(opts.config, opts.emit_config)
+        except OSError as e:
+            log.error(f"Failed to write config file ({opts.emit_config}): {e}")
+            return ExitCode.FILE_IO
+    return ExitCode.CLEAN
+
+
+def run_patch(
+    opts: CliOptions, lobj: Any, robj: Any, stats: Optional[Stats] = None
+) -> ExitCode:
+    """Write the JSON Patch turning the left object into the right"""
+    from odiff.patch import iter_patch, write_patch
+
+    with stats.phase("patch") if stats else nullcontext():
+        write_patch(iter_patch(lobj, robj, opts.config), sys.stdout)
+    return ExitCode.CLEAN
+
+
+def limit_of(opts: CliOptions) -> Optional[int]:
+    """Number of discrepancies after which the diff may stop, if any"""
+    return 1 if opts.quiet else opts.max_discrepancies
+
+
+def run_batch(opts: CliOptions, stats: Optional[Stats] = None) -> ExitCode:
+    """Diff every pair of files of a batch mode, with a single exit code"""
+    from odiff.batch import (
+        batch_odiff,
+        pair_baseline,
+        pair_directories,
+        pair_manifest,
+        write_reports,
+    )
+
+    try:
+        if opts.manifest:
+            pairs: List[FilePair] = pair_manifest(opts.manifest)
+        elif opts.baseline:
+            pairs = pair_baseline(opts.baseline, opts.files)
+        else:
+            pairs = pair_directories(opts.files[0], opts.files[1])
+    except (OSError, ValueError) as e:
+        log.error(f"Failed to pair files: {e}")
+        return ExitCode.USER_FAULT
+    reports = batch_odiff(
+        pairs,
+        opts.config,
+        opts.workers,
+        opts.merkle,
+        opts.cache,
+        stats is not None or opts.output_type in SUMMARY_TYPES,
+        limit_of(opts),
+    )
+    summary: BatchSummary = write_reports(
+        reports,
+        opts.output_type,
+        sys.stdout,
+        opts.raw,
+        opts.unified_diff,
+        stats,
+        opts.quiet,
+        opts.table,
+        opts.summary,
+    )
+    if opts.quiet:
+        if summary.status == ExitCode.CLEAN and summary.differing:
+            return ExitCode.DISCREPANCIES
+        return summary.status
+    log.info(summary)
+    return summary.status
+
+
+def read_object_files(
+    opts: CliOptions,
+    cache: Optional["SnapshotCache"] = None,
+    stats: Optional[Stats] = None,
+) -> Tuple[Any, Any, ExitCode]:
+    load = partial(cache.load if cache else load_file, stats=stats)
+    (lobj, lerr), (robj, rerr) = load_files(opts.lfname, opts.rfname, load=load)
+    if lerr:
         if not isinstance(lobj, str):
             log.error(f"Failed to read object file ({opts.lfname})")
             return None, None, ExitCode.USER_FAULT
         log.warning(f"File not JSON or YAML, read as string ({opts.lfname})")
-    robj, err = read_object_file(opts.rfname)
-    if err:
+    if rerr:
         if not isinstance(robj, str):
             log.error(f"Failed to read object file ({opts.rfname})")
             return None, None, ExitCode.USER_FAULT
@@ -59,25 +276,15 @@ def read_object_files(opts: CliOptions) -> Tuple[Any, Any, ExitCode]:
 
 
 def format_discrepancies(
-    output_type: OutputType, discrepancies: Discrepancies, raw: bool
+    output_type: OutputType,
+    discrepancies: Discrepancies,
+    raw: bool,
+    unified_diff: Optional[UnifiedDiffOptions] = None,
 ) -> str:
-    match output_type:
-        case OutputType.OBJECT:
-            return pformat(discrepancies)
-        case OutputType.JSON:
-            return json.dumps([d.__dict__ for d in discrepancies], indent=2)
-        case OutputType.SIMPLE:
-            return "\n".join([str(d) for d in discrepancies])
-        case OutputType.ONE_LINE:
-            return "\n".join([d.one_line() for d in discrepancies])
-        case OutputType.TABLE:
-            return tabulate(
-                [d.for_tabulation(raw) for d in discrepancies],
-                headers=Discrepancy.tabulation_headers(raw),
-                tablefmt="rounded_grid",
-            )
-        case o:
-            raise Exception(f"Output type is not implemented ({o})")
+    """Render the discrepancies, only building unified diffs if displayed"""
+    out: StringIO = StringIO()
+    writer_for(output_type, out, raw, unified_diff).write_all(discrepancies)
+    return out.getvalue().removesuffix("\n")
 
 
 if __name__ == "__main__":
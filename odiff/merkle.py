@@ -0,0 +1,237 @@
+from functools import lru_cache
+from hashlib import blake2b
+from itertools import chain, count
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from odiff.hashing import coerce_scalar
+from odiff.options import OdiffConfig
+from odiff.path import PathMatcher
+from odiff.util import all_dicts, separate_compliant_list
+
+DIGEST_SIZE = 16
+
+_NAN_SALT = count()
+
+# Child entries of a container; the slot in which the child's digest is
+#  collected, the digest of its key, the child, and the node under which it is
+#  walked, `None` if it is compared whole as an element of an unkeyed list
+type Child = Tuple[int, bytes, Any, Optional[PathMatcher]]
+
+# Kinds of container whose children are combined in order
+_ORDERED = (b"l", b"o")
+
+
+def _hash(data: bytes) -> bytes:
+    return blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def _scalar_bytes(value: Any) -> bytes:
+    match value:
+        case str():
+            return b"s" + value.encode("utf-8", "surrogatepass")
+        case float():
+            if value != value:
+                # NaN is never equal, not even to itself
+                return b"nan" + str(next(_NAN_SALT)).encode()
+            return b"f" + repr(value).encode()
+        case bytes():
+            return b"b" + value
+        case None:
+            return b"n"
+        case _:
+            return f"o{type(value).__name__}:{value!r}".encode()
+
+
+def _leaf_entry(value: Any, exact: bool) -> bytes:
+    # Scalars are not hashed alone but length-prefixed in their parent's entry
+    data: bytes = _scalar_bytes(value if exact else coerce_scalar(value))
+    return b"%d:%s" % (len(data), data)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _key_digest(key: Any) -> bytes:
+    return _hash(_scalar_bytes(key))
+
+
+def _children(
+    container: Any,
+    node: Optional[PathMatcher],
+    root: bool,
+    keys: bool = True,
+    exact: bool = False,
+) -> Tuple[bytes, Iterator[Child]]:
+    key_digest = _key_digest if keys else _no_digest
+    # Exact digests are of every container, so each has a node
+    if exact and node is not None:
+        if isinstance(container, dict):
+            return b"o", (
+                (0, key_digest(k), v, node.key(k)) for k, v in container.items()
+            )
+        element: PathMatcher = node.element()
+        return b"l", ((0, b"", e, element) for e in container)
+    if isinstance(container, dict):
+        if node is None:
+            return b"d", (
+                (0, key_digest(k), v, None) for k, v in container.items()
+            )
+        return b"d", (
+            (0, key_digest(k), v, child)
+            for k, v in container.items()
+            if not (child := node.key(k)).excluded
+        )
+    if node is None:
+        return b"l", ((0, b"", e, None) for e in container)
+    if node.list_index and (root or all_dicts(container)):
+        compliant, non_compliant = separate_compliant_list(
+            node.list_index, container
+        )
+        element: PathMatcher = node.element()
+        keyed: Iterator[Child] = (
+            (0, key_digest(k), e, element)
+            for k, e in ([] if element.excluded else compliant.items())
+        )
+        return b"k", chain(keyed, ((1, b"", e, None) for e in non_compliant))
+    if node.ordered or node.tolerance is not None:
+        # Aligned by canonical key, or numbers by position, neither of which
+        #  excludes anything, so neither may this
+        return b"l", ((0, b"", e, None) for e in container)
+    return b"m", ((0, b"", e, None) for e in container)
+
+
+def _no_digest(_: Any) -> bytes:
+    return b""
+
+
+def _combine(kind: bytes, slots: List[List[bytes]]) -> bytes:
+    entries, non_compliant = slots
+    if kind not in _ORDERED:
+        entries.sort()
+    if kind != b"k":
+        return _hash(kind + b"".join(entries))
+    non_compliant.sort()
+    return _hash(kind + b"".join(entries) + b"|" + b"".join(non_compliant))
+
+
+class DigestIndex:
+    """Structural digests of every container of an object, walked by a config
+
+    Two containers at the same path have equal digests only when diffing them
+     would find no (non-excluded) discrepancies; so scalars are float coerced,
+     excluded keys are ignored, unkeyed lists are compared as multisets, or
+     in order if so configured or given a tolerance, and keyed lists as maps
+     of their keys
+
+    Exact digests are instead equal only when the containers are, scalar for
+     scalar and in order, so anything found beneath one pair of containers
+     holds, value for value, for another with equal digests
+
+    The index holds a reference to the object, it may be kept and reused for
+     any number of diffs against other objects under an equal config
+
+    :param obj: Any, the object to digest
+    :param config: Configuration for index-based comparisons and exclusions
+    :param ordered: Optional[List[bytes]], digests previously listed by
+        :meth:`ordered` for an equal object and config, restored without
+        hashing
+    :param exact: bool, whether to build exact digests
+    """
+
+    def __init__(
+        self,
+        obj: Any,
+        config: OdiffConfig,
+        ordered: Optional[List[bytes]] = None,
+        exact: bool = False,
+    ):
+        self.obj: Any = obj
+        self.exact: bool = exact
+        self.matcher: PathMatcher = PathMatcher.compile(config)
+        self.digests: Dict[int, Tuple[PathMatcher, bytes]] = {}
+        self._ordered: List[bytes] = []
+        if ordered is None:
+            self.root: bytes = self._digest(obj, self.matcher)
+        else:
+            self.root = self._restore(obj, self.matcher, ordered)
+
+    def ordered(self) -> List[bytes]:
+        """The digests in the order of the walk, to be persisted"""
+        return self._ordered
+
+    def get(self, value: Any, node: PathMatcher) -> Optional[bytes]:
+        """The digest of a container if walked under the node `node`"""
+        entry = self.digests.get(id(value))
+        if entry is None or entry[0] is not node:
+            return None
+        return entry[1]
+
+    def _digest(self, obj: Any, matcher: PathMatcher) -> bytes:
+        exact: bool = self.exact
+        if not isinstance(obj, (dict, list)):
+            return _hash(_leaf_entry(obj, exact))
+        # Post-order walk with an explicit stack, each frame holding the
+        #  container, its node, its kind, its remaining children, the slots of
+        #  its children's digests, and its own slot and key in its parent
+        kind, children = _children(obj, matcher, True, exact=exact)
+        result: List[List[bytes]] = [[]]
+        stack: List[Tuple[Any, Any, bytes, Iterator, List, int, bytes]] = [
+            (obj, matcher, kind, children, [[], []], 0, b"")
+        ]
+        while stack:
+            container, node, kind, children, slots, slot, key = stack[-1]
+            for child_slot, child_key, child, child_node in children:
+                if isinstance(child, (dict, list)):
+                    child_kind, grandchildren = _children(
+                        child, child_node, False, exact=exact
+                    )
+                    stack.append(
+                        (
+                            child,
+                            child_node,
+                            child_kind,
+                            grandchildren,
+                            [[], []],
+                            child_slot,
+                            child_key,
+                        )
+                    )
+                    break
+                slots[child_slot].append(
+                    child_key + b"v" + _leaf_entry(child, exact)
+                )
+            else:
+                stack.pop()
+                digest: bytes = _combine(kind, slots)
+                if node is not None:
+                    self._ordered.append(digest)
+                    self.digests.setdefault(id(container), (node, digest))
+                parent = stack[-1][4] if stack else result
+                parent[slot].append(key + b"c" + digest)
+        return result[0][0]
+
+    def _restore(
+        self, obj: Any, matcher: PathMatcher, ordered: List[bytes]
+    ) -> bytes:
+        # The same walk as `_digest`, assigning each digest in turn
+        exact: bool = self.exact
+        if not isinstance(obj, (dict, list)):
+            return _hash(_leaf_entry(obj, exact))
+        digests: Iterator[bytes] = iter(ordered)
+        stack: List[Tuple[Any, Any, Iterator]] = [
+            (obj, matcher, _children(obj, matcher, True, False, exact)[1])
+        ]
+        while stack:
+            container, node, children = stack[-1]
+            for _, _, child, child_node in children:
+                if isinstance(child, (dict, list)):
+                    grandchildren = _children(
+                        child, child_node, False, False, exact
+                    )
+                    stack.append((child, child_node, grandchildren[1]))
+                    break
+            else:
+                stack.pop()
+                if node is not None:
+                    digest: bytes = next(digests)
+                    self._ordered.append(digest)
+                    self.digests.setdefault(id(container), (node, digest))
+        return self._ordered[-1]
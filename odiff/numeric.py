@@ -0,0 +1,87 @@
+import math
+from array import array
+from typing import Any, Iterator, List, Optional, Tuple
+
+from odiff.options import Tolerance
+
+type Run = Tuple[int, int]
+
+# Types of the elements of numeric arrays; not `bool`, though it is an `int`
+NUMBERS = (int, float)
+
+
+def numeric_array(lst: List[Any]) -> Optional[array]:
+    """Pack a list of ints and floats into an array of doubles, None if it
+    holds anything else"""
+    for e in lst:
+        if type(e) is not float and type(e) is not int:
+            return None
+    try:
+        return array("d", lst)
+    except OverflowError:
+        return None
+
+
+def close(a: float, b: float, tolerance: Optional[Tolerance]) -> bool:
+    """Whether two numbers are equal, or within the tolerance of each other,
+    by the rules of :func:`math.isclose`"""
+    if a == b:
+        return True
+    if tolerance is None:
+        return False
+    return math.isclose(
+        a, b, rel_tol=tolerance.relative, abs_tol=tolerance.absolute
+    )
+
+
+def mismatches(
+    a1: array, a2: array, tolerance: Optional[Tolerance] = None
+) -> Iterator[Run]:
+    """Runs of positions, up to the shorter length, at which two arrays are
+    not close; compared with NumPy, if installed
+
+    :param a1: array, the "left" array of doubles
+    :param a2: array, the "right" array of doubles
+    :param tolerance: Optional[Tolerance], within which elements are equal
+
+    :return: Iterator of the start and end of each run
+    :rtype: Iterator[Tuple[int, int]]
+    """
+    n: int = min(len(a1), len(a2))
+    if len(a1) == len(a2) and a1 == a2:
+        return iter(())
+    try:
+        import numpy  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        return _mismatches(a1, a2, n, tolerance)
+    x = numpy.frombuffer(a1, dtype=numpy.float64, count=n)
+    y = numpy.frombuffer(a2, dtype=numpy.float64, count=n)
+    if tolerance is None:
+        ok = x == y
+    else:
+        with numpy.errstate(invalid="ignore", over="ignore"):
+            allowed = numpy.maximum(
+                tolerance.absolute,
+                tolerance.relative * numpy.maximum(abs(x), abs(y)),
+            )
+            # Infinities are close only to themselves, as with `math.isclose`
+            finite = numpy.isfinite(x) & numpy.isfinite(y)
+            ok = (x == y) | (finite & (abs(x - y) <= allowed))
+    # Starts and ends of runs are where a padded mask of mismatches changes
+    edges = numpy.flatnonzero(numpy.diff(numpy.pad(~ok, 1).view(numpy.int8)))
+    return zip(edges[::2].tolist(), edges[1::2].tolist())
+
+
+def _mismatches(
+    a1: array, a2: array, n: int, tolerance: Optional[Tolerance]
+) -> Iterator[Run]:
+    start: Optional[int] = None
+    for i in range(n):
+        if close(a1[i], a2[i], tolerance):
+            if start is not None:
+                yield start, i
+                start = None
+        elif start is None:
+            start = i
+    if start is not None:
+        yield start, n
@@ -1,15 +1,164 @@
-import re
-from logging import Logger
-from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from __future__ import annotations
 
+from array import array
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from logging import DEBUG, Logger
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from odiff.align import edits
 from odiff.discrepancy import Discrepancies, Discrepancy
+from odiff.hashing import multiset_difference
 from odiff.logger import get_logger
-from odiff.options import OdiffConfig
-from odiff.util import all_dicts
+from odiff.numeric import NUMBERS, close, mismatches, numeric_array
+from odiff.options import OdiffConfig, Tolerance, UnifiedDiffOptions
+from odiff.path import (
+    ELEMENTS,
+    Index,
+    Path,
+    PathMatcher,
+    render_path,
+)
+from odiff.stats import Stats
+from odiff.util import all_dicts, separate_compliant_list
 
+if TYPE_CHECKING:
+    from odiff.merkle import DigestIndex
 
 log: Logger = get_logger("odiff")
 
+type Work = Iterator[Discrepancy | Iterator]
+
+type MemoKey = Tuple[Path, bytes, bytes]
+
+MEMO_MAX_DEPTH = 8
+
+
+class SubtreeMemo:
+    """Discrepancies found beneath pairs of containers, kept between diffs
+
+    Entries are keyed by the path and the exact digests of both containers,
+     see :class:`odiff.merkle.DigestIndex`, so a pair whose content is
+     unchanged since a previous diff is not walked again; entries not
+     recalled by the latest diff are forgotten
+
+    :param max_depth: int, length of the longest path memoized, deeper pairs
+        are covered by the entry of their ancestor
+    """
+
+    def __init__(self, max_depth: int = MEMO_MAX_DEPTH):
+        self.max_depth: int = max_depth
+        self.entries: Dict[MemoKey, Discrepancies] = {}
+        self.recalled: Dict[MemoKey, Discrepancies] = {}
+
+    def recall(
+        self, key: MemoKey, walk: Callable[[], Iterator[Discrepancy]]
+    ) -> Discrepancies:
+        """The discrepancies of a pair, walked only if not yet memoized"""
+        found: Optional[Discrepancies] = self.entries.get(key)
+        if found is None:
+            found = list(walk())
+        self.recalled[key] = found
+        return found
+
+    def rotate(self):
+        """Forget every entry not recalled since the last rotation"""
+        self.entries, self.recalled = self.recalled, {}
+
+
+class ExclusionLog:
+    """Discrepancies ignored by each exclusion
+
+    Each is logged up to `limit` per exclusion, beyond which they are only
+     counted, and logged at DEBUG, so noisy exclusions neither flood the log
+     nor slow the walk; :meth:`report` then logs the count of the rest once
+
+    :param limit: int, discrepancies logged per exclusion
+    :param stats: Optional[Stats], counters to which to add the exclusions
+    """
+
+    def __init__(
+        self,
+        limit: int = OdiffConfig.exclusion_log_limit,
+        stats: Optional[Stats] = None,
+    ):
+        self.limit: int = limit
+        self.stats: Optional[Stats] = stats
+        self.counts: Dict[str, int] = {}
+
+    def excluded(self, exclusion: str, path: Path):
+        n: int = self.counts.get(exclusion, 0) + 1
+        self.counts[exclusion] = n
+        if self.stats is not None:
+            self.stats.exclusions += 1
+            self.stats.excluded_by[exclusion] = (
+                self.stats.excluded_by.get(exclusion, 0) + 1
+            )
+        if n <= self.limit:
+            log.warning(_excluded_message(path))
+        elif log.isEnabledFor(DEBUG):
+            log.debug(_excluded_message(path))
+
+    def report(self):
+        """Log the number of discrepancies of each exclusion not logged"""
+        for exclusion, n in self.counts.items():
+            if n > self.limit:
+                log.warning(
+                    f"{n - self.limit} more discrepancies excluded by"
+                    f" '{exclusion}' (--exclusion-log-limit)"
+                )
+
+
+@dataclass
+class _Context:
+    """State shared by the whole of a walk"""
+
+    ldigests: Optional[DigestIndex] = None
+    rdigests: Optional[DigestIndex] = None
+    memo: Optional[SubtreeMemo] = None
+    stats: Optional[Stats] = None
+    exclusions: ExclusionLog = field(default_factory=ExclusionLog)
+
+    def excluded(self, path: Path, exclusion: str):
+        self.exclusions.excluded(exclusion, path)
+
+    def lists_seen(self, path: Path, l1: Sequence[Any], l2: Sequence[Any]):
+        if self.stats is not None:
+            self.stats.nodes += 1
+            self.stats.list_seen(path, max(len(l1), len(l2)))
+
+    def identical(self, v1: Any, v2: Any, node: PathMatcher) -> bool:
+        """Whether the digests of two containers show them to be equivalent"""
+        if self.ldigests is None or self.rdigests is None:
+            return False
+        digest: Optional[bytes] = self.ldigests.get(v1, node)
+        return digest is not None and digest == self.rdigests.get(v2, node)
+
+    def memo_key(
+        self, v1: Any, v2: Any, path: Path, node: PathMatcher
+    ) -> Optional[MemoKey]:
+        """The key of a pair of containers in the memo, if memoized"""
+        if self.memo is None or len(path) > self.memo.max_depth:
+            return None
+        if self.ldigests is None or self.rdigests is None:
+            return None
+        ldigest: Optional[bytes] = self.ldigests.get(v1, node)
+        rdigest: Optional[bytes] = self.rdigests.get(v2, node)
+        if ldigest is None or rdigest is None:
+            return None
+        return path, ldigest, rdigest
+
 
 def odiff(
     lobj: Any,
@@ -17,63 +166,124 @@ def odiff(
     config: OdiffConfig,
     lfname: str = "",
     rfname: str = "",
+    **kwargs,
 ) -> Discrepancies:
+    return list(iter_odiff(lobj, robj, config, lfname, rfname, **kwargs))
+
+
+def iter_odiff(
+    lobj: Any,
+    robj: Any,
+    config: OdiffConfig,
+    lfname: str = "",
+    rfname: str = "",
+    merkle: bool = False,
+    ldigests: Optional[DigestIndex] = None,
+    rdigests: Optional[DigestIndex] = None,
+    memo: Optional[SubtreeMemo] = None,
+    stats: Optional[Stats] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Discrepancy]:
+    """Lazily find discrepancies between two objects
+
+    The objects are walked with an explicit stack, not recursion, so there is
+     no limit on their depth and discrepancies are yielded as they are found;
+     consumers may stop early, or set `limit` to stop the walk at the Nth
+
+    :param lobj: Any, the "left" object against which to compare
+    :param robj: Any, the "right" object against which to compare
+    :param config: Configuration for index-based comparisons and exclusions
+    :param lfname: str, name of the left file for unified diffs
+    :param rfname: str, name of the right file for unified diffs
+    :param merkle: bool, whether to digest both objects first, so subtrees
+        with equal digests are skipped rather than walked
+    :param ldigests: Optional[DigestIndex], digests of `lobj` to reuse, which
+        implies `merkle`
+    :param rdigests: Optional[DigestIndex], digests of `robj` to reuse, which
+        implies `merkle`
+    :param memo: Optional[SubtreeMemo], discrepancies of subtrees from
+        previous diffs to reuse and update, which implies `merkle` and
+        requires any digests given to be exact
+    :param stats: Optional[Stats], counters to which to add those of this
+        diff, and the time spent digesting
+    :param limit: Optional[int], number of discrepancies after which to stop
+        walking, all are found if None
+
+    :return: Iterator of discrepancies
+    :rtype: Iterator[Discrepancy]
+    """
+    matcher: PathMatcher = PathMatcher.compile(config)
+    ctx: _Context = _Context(
+        memo=memo,
+        stats=stats,
+        exclusions=ExclusionLog(config.exclusion_log_limit, stats),
+    )
+    if merkle or ldigests or rdigests or memo:
+        from odiff.merkle import DigestIndex
+
+        exact: bool = memo is not None
+        with stats.phase("digest") if stats else nullcontext():
+            ctx.ldigests = ldigests or DigestIndex(lobj, config, exact=exact)
+            ctx.rdigests = rdigests or DigestIndex(robj, config, exact=exact)
+        if ctx.identical(lobj, robj, matcher):
+            return
     match lobj, robj:
         case list(), list():
-            discrepancies = diff_lists(lobj, robj, config)
+            root: Work = _expand_lists(lobj, robj, (), matcher, ctx)
         case dict(), dict():
-            discrepancies = diff_dicts(lobj, robj, config)
+            root = _expand_dicts(lobj, robj, (), False, matcher, ctx)
         case _:
-            discrepancies = diff_values(lobj, robj, config)
-    build_unified_diffs(discrepancies, lfname, rfname)
-    return discrepancies
+            root = _expand_values(lobj, robj, (), matcher, ctx)
+    for n, d in enumerate(_walk(root), 1):
+        d.lfname, d.rfname = lfname, rfname
+        # Reported before the last is yielded, as its consumer stops there
+        if n == limit:
+            ctx.exclusions.report()
+            yield d
+            return
+        yield d
+    ctx.exclusions.report()
+    if memo is not None:
+        memo.rotate()
 
 
 def diff_dicts(
     d1: Dict[str, Any],
     d2: Dict[str, Any],
     config: OdiffConfig,
-    path: str = "",
+    path: Path = (),
     is_from_array: bool = False,
+    matcher: Optional[PathMatcher] = None,
 ) -> Discrepancies:
     """Find discrepancies between two dictionaries
 
     :param r1: Dict[str, Any], the "left" list against which to compare
     :param r2: Dict[str, Any], the "right" list against which to compare
-    :param list_cfg: List configuration for index-based comparisons
+    :param config: Configuration for index-based comparisons and exclusions
     :param path: Path through any calling objects
     :param is_from_array: Whether these are dictionaries being compared with
         lists already being compared
+    :param matcher: Node of the compiled `config` for `path`, compiled if not
+        provided
 
     :return: List of discrepancies
     :rtype: Discrepancies
     """
-    discrepancies: Discrepancies = []
-    missing_in_j1: Set[str] = d2.keys() - d1.keys()
-    for k in missing_in_j1:
-        subpath: str = _append_path_element(path, k, is_from_array)
-        if _path_to_key(subpath) in config.exclusions:
-            _log_discrepency(subpath)
-            continue
-        discrepancies.append(Discrepancy.sub(subpath, d2[k]))
-    for k, v in d1.items():
-        subpath: str = _append_path_element(path, k, is_from_array)
-        if _path_to_key(subpath) in config.exclusions:
-            _log_discrepency(subpath)
-            continue
-        if k not in d2:
-            discrepancies.append(Discrepancy.add(subpath, d1[k]))
-            continue
-        discrepancies.extend(diff_values(v, d2[k], config, subpath))
-    return discrepancies
+    node: PathMatcher = _matcher_for(config, path, matcher)
+    ctx: _Context = _context_for(config)
+    found: Discrepancies = list(
+        _walk(_expand_dicts(d1, d2, path, is_from_array, node, ctx))
+    )
+    ctx.exclusions.report()
+    return found
 
 
 def diff_lists(
     l1: List[Any],
     l2: List[Any],
     config: OdiffConfig,
-    list_cfg_key: str = ".",
-    path: str = "",
+    path: Path = (),
+    matcher: Optional[PathMatcher] = None,
 ) -> Discrepancies:
     """Find discrepancies between two lists
 
@@ -86,112 +296,308 @@ def diff_lists(
      difference we care about?
 
     For that, we need to compare by some unique key, say a '.id' or similar,
-     that's what we're doing with `list_cfg`, a map of paths through the
-     object(s) to uniqlistue keys
+     that's what we're doing with `config.list_indices`, a map of paths through
+     the object(s) to unique keys
 
     :param l1: List[Any], the "left" list against which to compare
     :param l2: List[Any], the "right" list against which to compare
-    :param list_cfg: List configuration for index-based comparisons
-    :param list_cfg_key: Key in `list_cfg` to index
+    :param config: Configuration for index-based comparisons and exclusions
     :param path: Path through any calling objects
+    :param matcher: Node of the compiled `config` for `path`, compiled if not
+        provided
 
     :return: List of discrepancies
     :rtype: Discrepancies
     """
-    list_cfg_id: Optional[str] = None
-    if list_cfg_key in config.list_indices:
-        list_cfg_id = config.list_indices[list_cfg_key]
-    d1, l1_non_compliant = _separate_compliant_list(list_cfg_id, l1)
-    d2, l2_non_compliant = _separate_compliant_list(list_cfg_id, l2)
-    discrepancies: Discrepancies = _simple_diff_lists(
-        f"{path}[]", l1_non_compliant, l2_non_compliant
-    )
-    discrepancies.extend(diff_dicts(d1, d2, config, path, is_from_array=True))
-    return discrepancies
+    node: PathMatcher = _matcher_for(config, path, matcher)
+    ctx: _Context = _context_for(config)
+    found: Discrepancies = list(_walk(_expand_lists(l1, l2, path, node, ctx)))
+    ctx.exclusions.report()
+    return found
 
 
-# TODO: Just could be much more robust
 def diff_values(
-    v1: Any, v2: Any, config: OdiffConfig, subpath: str = ""
+    v1: Any,
+    v2: Any,
+    config: OdiffConfig,
+    subpath: Path = (),
+    matcher: Optional[PathMatcher] = None,
+    exclusions: Optional[ExclusionLog] = None,
 ) -> Discrepancies:
-    if _path_to_key(subpath) in config.exclusions:
-        _log_discrepency(subpath)
-        return []
+    """Find discrepancies between two values of any type, counting any
+    exclusions in `exclusions` if given, for its owner to report, else
+    reporting them"""
+    node: PathMatcher = _matcher_for(config, subpath, matcher)
+    ctx: _Context = _context_for(config, exclusions)
+    found: Discrepancies = list(
+        _walk(_expand_values(v1, v2, subpath, node, ctx))
+    )
+    if exclusions is None:
+        ctx.exclusions.report()
+    return found
+
+
+def build_unified_diffs(
+    discrepancies: Discrepancies,
+    lfname: str = "",
+    rfname: str = "",
+    options: Optional[UnifiedDiffOptions] = None,
+):
+    """Eagerly build the, otherwise lazy, unified diff of each discrepancy"""
+    [d.build_unified_diff(lfname, rfname, options) for d in discrepancies]
+
+
+def _context_for(
+    config: OdiffConfig, exclusions: Optional[ExclusionLog] = None
+) -> _Context:
+    return _Context(
+        exclusions=exclusions or ExclusionLog(config.exclusion_log_limit)
+    )
+
+
+def _matcher_for(
+    config: OdiffConfig, path: Path, matcher: Optional[PathMatcher]
+) -> PathMatcher:
+    if matcher is not None:
+        return matcher
+    return PathMatcher.compile(config).descend(path)
+
+
+def _excluded_message(path: Path) -> str:
+    return f"Discrepancy found for path '.{render_path(path)}' but was excluded"
+
+
+def _append_path_element(orig: Path, curr: Any, is_from_array: bool) -> Path:
+    return (*orig, Index(curr) if is_from_array else curr)
+
+
+def _walk(root: Work) -> Iterator[Discrepancy]:
+    """Drain the expansion of a pair of objects and of all of its children
+
+    Each expansion yields discrepancies and, rather than recursing, the
+     expansions of child pairs, which are pushed to the stack and drained
+     before their parent is resumed; the order is that of a depth-first walk
+    """
+    stack: List[Work] = [root]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, Discrepancy):
+                yield item
+            else:
+                stack.append(item)
+                break
+        else:
+            stack.pop()
+
+
+def _expand_dicts(
+    d1: Dict[str, Any],
+    d2: Dict[str, Any],
+    path: Path,
+    is_from_array: bool,
+    node: PathMatcher,
+    ctx: _Context,
+) -> Work:
+    missing_in_j1: Set[str] = d2.keys() - d1.keys()
+    if ctx.stats is not None and not is_from_array:
+        ctx.stats.nodes += 1
+        ctx.stats.keys += len(d1) + len(missing_in_j1)
+    for k in missing_in_j1:
+        subpath: Path = _append_path_element(path, k, is_from_array)
+        subnode: PathMatcher = node.element() if is_from_array else node.key(k)
+        if subnode.excluded:
+            ctx.excluded(subpath, subnode.excluded)
+            continue
+        yield Discrepancy.sub(render_path(subpath), d2[k])
+    for k, v in d1.items():
+        subpath: Path = _append_path_element(path, k, is_from_array)
+        subnode: PathMatcher = node.element() if is_from_array else node.key(k)
+        if subnode.excluded:
+            ctx.excluded(subpath, subnode.excluded)
+            continue
+        if k not in d2:
+            yield Discrepancy.add(render_path(subpath), v)
+        elif isinstance(v, (dict, list)):
+            yield _expand_values(v, d2[k], subpath, subnode, ctx)
+        elif d := _diff_scalars(v, d2[k], subpath, subnode.tolerance):
+            yield d
+
+
+def _expand_lists(
+    l1: List[Any], l2: List[Any], path: Path, node: PathMatcher, ctx: _Context
+) -> Work:
+    if node.list_index is None and node.tolerance is not None:
+        if arrays := _numeric_arrays(l1, l2):
+            yield from _diff_numeric_lists(*arrays, path, node.tolerance, ctx)
+            return
+    if node.list_index is None and node.ordered:
+        yield _expand_ordered_lists(l1, l2, path, node, ctx)
+        return
+    d1, l1_non_compliant = separate_compliant_list(node.list_index, l1)
+    d2, l2_non_compliant = separate_compliant_list(node.list_index, l2)
+    if ctx.stats is not None:
+        ctx.lists_seen(path, l1, l2)
+        ctx.stats.keyed_elements += len(d1) + len(d2)
+        ctx.stats.multiset_elements += len(l1_non_compliant) + len(
+            l2_non_compliant
+        )
+    yield from _simple_diff_lists(
+        (*path, ELEMENTS), l1_non_compliant, l2_non_compliant
+    )
+    yield _expand_dicts(d1, d2, path, True, node, ctx)
+
+
+def _expand_ordered_lists(
+    l1: List[Any], l2: List[Any], path: Path, node: PathMatcher, ctx: _Context
+) -> Work:
+    # Paired elements are diffed, those of one list alone are added or
+    #  subtracted; paths index the left list, but for elements only in the
+    #  right list
+    if ctx.stats is not None:
+        ctx.lists_seen(path, l1, l2)
+        ctx.stats.ordered_elements += len(l1) + len(l2)
+    element: PathMatcher = node.element()
+    for i, j in edits(l1, l2):
+        subpath: Path = (*path, Index(j if i is None else i))
+        if i is not None and j is not None:
+            yield _expand_values(l1[i], l2[j], subpath, element, ctx)
+        elif element.excluded:
+            ctx.excluded(subpath, element.excluded)
+        elif i is not None:
+            yield Discrepancy.add(render_path(subpath), l1[i])
+        elif j is not None:
+            yield Discrepancy.sub(render_path(subpath), l2[j])
+
+
+def _expand_values(
+    v1: Any,
+    v2: Any,
+    path: Path,
+    node: PathMatcher,
+    ctx: _Context,
+    memoize: bool = True,
+) -> Work:
+    if node.excluded:
+        ctx.excluded(path, node.excluded)
+        return
+    if ctx.identical(v1, v2, node):
+        return
+    if memoize and ctx.memo and (key := ctx.memo_key(v1, v2, path, node)):
+        yield from ctx.memo.recall(
+            key,
+            lambda: _walk(_expand_values(v1, v2, path, node, ctx, False)),
+        )
+        return
     match v1:
         case dict():
             if not isinstance(v2, dict):
-                return [Discrepancy.mod(subpath, v1, v2)]
-            return diff_dicts(v1, v2, config, subpath)
+                yield Discrepancy.mod(render_path(path), v1, v2)
+                return
+            yield _expand_dicts(v1, v2, path, False, node, ctx)
         case list():
-            list_cfg_key = _path_to_key(subpath)
-            if all_dicts(v1) and list_cfg_key in config.list_indices:
-                return diff_lists(v1, v2, config, list_cfg_key, subpath)
-            return _simple_diff_lists(f"{subpath}[]", v1, v2)
+            if not isinstance(v2, list):
+                yield Discrepancy.mod(render_path(path), v1, v2)
+                return
+            if node.list_index is not None and all_dicts(v1):
+                yield _expand_lists(v1, v2, path, node, ctx)
+                return
+            if node.tolerance is not None and (
+                arrays := _numeric_arrays(v1, v2)
+            ):
+                yield from _diff_numeric_lists(
+                    *arrays, path, node.tolerance, ctx
+                )
+                return
+            if node.ordered:
+                yield _expand_ordered_lists(v1, v2, path, node, ctx)
+                return
+            if ctx.stats is not None:
+                ctx.lists_seen(path, v1, v2)
+                ctx.stats.multiset_elements += len(v1) + len(v2)
+            yield from _simple_diff_lists((*path, ELEMENTS), v1, v2)
         case _:
-            try:
-                v1 = float(v1)
-                v2 = float(v2)
-            except Exception:
-                pass
-            if v1 != v2:
-                return [Discrepancy.mod(subpath, v1, v2)]
-            return []
+            if d := _diff_scalars(v1, v2, path, node.tolerance):
+                yield d
 
 
-def build_unified_diffs(
-    discrepancies: Discrepancies, lfname: str = "", rfname: str = ""
-):
-    [d.build_unified_diff(lfname, rfname) for d in discrepancies]
+def _diff_scalars(
+    v1: Any, v2: Any, path: Path, tolerance: Optional[Tolerance] = None
+) -> Optional[Discrepancy]:
+    # Equal numbers, by far the commonest leaves, are equal once coerced too
+    if type(v1) in NUMBERS and type(v2) in NUMBERS and v1 == v2:
+        return None
+    # Others, strings of numbers included, compare as numbers where both are
+    #  numeric, else as they are
+    try:
+        v1 = float(v1)
+        v2 = float(v2)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    if v1 == v2:
+        return None
+    if type(v1) is float and type(v2) is float and close(v1, v2, tolerance):
+        return None
+    return Discrepancy.mod(render_path(path), v1, v2)
 
 
-def _log_discrepency(path: str):
-    log.warn(f"Discrepancy found for path '.{path}' but was excluded")
+def _numeric_arrays(
+    l1: List[Any], l2: List[Any]
+) -> Optional[Tuple[array[float], array[float]]]:
+    a1: Optional[array[float]] = numeric_array(l1)
+    if a1 is None:
+        return None
+    a2: Optional[array[float]] = numeric_array(l2)
+    if a2 is None:
+        return None
+    return a1, a2
 
 
-def _append_path_element(orig: str, curr: str, is_from_array: bool) -> str:
-    path: str = orig
-    if len(orig) > 0 and not is_from_array:
-        path += "."
-    if is_from_array:
-        path += f"[{curr}]"
-    else:
-        path += curr
-    return path
+def _diff_numeric_lists(
+    a1: array[float],
+    a2: array[float],
+    path: Path,
+    tolerance: Tolerance,
+    ctx: _Context,
+) -> Iterator[Discrepancy]:
+    # Compared by position, each run of mismatches is a single discrepancy of
+    #  a slice, as are the elements beyond the end of the shorter array
+    if ctx.stats is not None:
+        ctx.lists_seen(path, a1, a2)
+        ctx.stats.numeric_elements += len(a1) + len(a2)
+    n: int = min(len(a1), len(a2))
+    for start, end in mismatches(a1, a2, tolerance):
+        yield Discrepancy.mod(
+            render_path((*path, _slice(start, end))),
+            _values(a1, start, end),
+            _values(a2, start, end),
+        )
+    if len(a1) > n:
+        yield Discrepancy.add(
+            render_path((*path, _slice(n, len(a1)))),
+            _values(a1, n, len(a1)),
+        )
+    if len(a2) > n:
+        yield Discrepancy.sub(
+            render_path((*path, _slice(n, len(a2)))),
+            _values(a2, n, len(a2)),
+        )
 
 
-def _path_to_key(path: str) -> str:
-    return "." + re.sub(r"\[([^\]]*)\]", "[]", path)
+def _slice(start: int, end: int) -> Index:
+    return Index(start if end == start + 1 else f"{start}:{end}")
+
+
+def _values(a: Sequence[float], start: int, end: int) -> float | List[float]:
+    return a[start] if end == start + 1 else list(a[start:end])
 
 
 def _simple_diff_lists(
-    path: str, l1: List[Any], l2: List[Any]
+    path: Path, l1: List[Any], l2: List[Any]
 ) -> Discrepancies:
     discrepancies: Discrepancies = []
-    missing_in_l1: List[Any] = [e for e in l2 if e not in l1]
-    missing_in_l2: List[Any] = [e for e in l1 if e not in l2]
+    missing_in_l1, missing_in_l2 = multiset_difference(l1, l2)
     if len(missing_in_l1) > 0 or len(missing_in_l2) > 0:
         discrepancies.append(
-            Discrepancy.mod(
-                path, [e for e in missing_in_l1], [e for e in missing_in_l2]
-            )
+            Discrepancy.mod(render_path(path), missing_in_l1, missing_in_l2)
         )
     return discrepancies
-
-
-def _separate_compliant_list(
-    list_key: Optional[str], list_of_dicts: List[Any]
-) -> Tuple[Dict[str, dict], List[Any]]:
-    if not list_key:
-        return {}, list_of_dicts
-    compliant: Dict[str, dict] = {}
-    non_compliant: List[Any] = []
-    for e in list_of_dicts:
-        if (
-            list_key in e
-            and isinstance(e, dict)
-            and isinstance(e[list_key], Hashable)
-        ):
-            compliant[e[list_key]] = e
-        else:
-            non_compliant.append(e)
-    return compliant, non_compliant
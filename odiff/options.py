@@ -1,20 +1,62 @@
 from dataclasses import dataclass, field
 from enum import StrEnum
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Tolerance:
+    """Difference within which two numbers are equal, the greater of
+    `absolute` and `relative` times the greater magnitude"""
+
+    absolute: float = 0.0
+    relative: float = 0.0
 
 
 @dataclass
 class OdiffConfig:
     list_indices: Dict[str, str] = field(default_factory=dict)
     exclusions: List[str] = field(default_factory=list)
+    ordered_lists: List[str] = field(default_factory=list)
+    ordered: bool = False
+    tolerances: Dict[str, Tolerance] = field(default_factory=dict)
+    document_keys: List[str] = field(default_factory=list)
+    exclusion_log_limit: int = 10
+
+
+@dataclass
+class UnifiedDiffOptions:
+    context: int = 10
+    max_lines: Optional[int] = None
+
+
+@dataclass
+class TableOptions:
+    page_size: int = 500
+    limit: Optional[int] = None
+
+
+@dataclass
+class SummaryOptions:
+    top: Optional[int] = None
+
+
+@dataclass
+class CacheOptions:
+    enabled: bool = False
+    directory: Optional[str] = None
+    max_bytes: int = 256 << 20
 
 
 class OutputType(StrEnum):
     JSON = "json"
+    JSONL = "jsonl"
     TABLE = "table"
     OBJECT = "object"
     SIMPLE = "simple"
     ONE_LINE = "one-line"
+    SUMMARY = "summary"
+    SUMMARY_JSON = "summary-json"
+    JSON_PATCH = "json-patch"
 
 
 @dataclass
@@ -24,4 +66,26 @@ class CliOptions:
     rfname: str
     log_level: int
     raw: bool
+    stream: bool = False
+    documents: bool = False
+    merkle: bool = False
+    files: List[str] = field(default_factory=list)
+    batch: bool = False
+    manifest: Optional[str] = None
+    baseline: Optional[str] = None
+    workers: Optional[int] = None
+    watch: bool = False
+    watch_delta: bool = False
+    watch_interval: float = 0.5
+    stats: bool = False
+    timings: bool = False
+    profile: Optional[str] = None
+    quiet: bool = False
+    max_discrepancies: Optional[int] = None
+    infer_list_indices: bool = False
+    emit_config: Optional[str] = None
     config: OdiffConfig = field(default_factory=OdiffConfig)
+    unified_diff: UnifiedDiffOptions = field(default_factory=UnifiedDiffOptions)
+    table: TableOptions = field(default_factory=TableOptions)
+    summary: SummaryOptions = field(default_factory=SummaryOptions)
+    cache: CacheOptions = field(default_factory=CacheOptions)
@@ -0,0 +1,425 @@
+import json
+import sys
+from argparse import ArgumentParser
+from copy import deepcopy
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+from odiff.align import alignment, keys_of
+from odiff.hashing import canonical
+from odiff.loader import load_file
+from odiff.numeric import close, numeric_array
+from odiff.options import OdiffConfig, Tolerance
+from odiff.path import PathMatcher
+from odiff.util import ExitCode
+
+type Op = Dict[str, Any]
+
+type Pointer = Tuple[str, ...]
+
+type PatchWork = Iterator[Op | Iterator]
+
+# Types of JSON numbers, compared by value by `test`; not `bool`, though it
+#  is an `int`
+_NUMBERS = (int, float)
+
+
+def iter_patch(
+    lobj: Any, robj: Any, config: Optional[OdiffConfig] = None
+) -> Iterator[Op]:
+    """Lazily build the RFC 6902 JSON Patch turning one object into another
+
+    The objects are walked as by :func:`odiff.odiff.iter_odiff`, but each
+     operation changes only what differs, and its path is a JSON Pointer
+     indexing each list as it stands when the operation is applied, so the
+     patch replays the diff
+
+    Lists are aligned in order, those with a list index by the value of the
+     key, others by equal elements, and paired elements are patched rather
+     than replaced; numeric lists under a tolerance are patched by position.
+     Excluded paths, and numbers within tolerance, are left as they are, so
+     the result equals `robj` but for them
+
+    :param lobj: Any, the "left" object, to which the patch applies
+    :param robj: Any, the "right" object, which the patch produces
+    :param config: Optional[OdiffConfig], the list indices, exclusions, and
+        tolerances of the diff
+
+    :return: Iterator of the operations, in the order they must be applied
+    :rtype: Iterator[Dict[str, Any]]
+    """
+    matcher: PathMatcher = PathMatcher.compile(config or OdiffConfig())
+    stack: List[PatchWork] = [_patch_values(lobj, robj, (), matcher)]
+    # Drained depth-first without recursion, as `odiff.odiff._walk`
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, dict):
+                yield item
+            else:
+                stack.append(item)
+                break
+        else:
+            stack.pop()
+
+
+def make_patch(
+    lobj: Any, robj: Any, config: Optional[OdiffConfig] = None
+) -> List[Op]:
+    return list(iter_patch(lobj, robj, config))
+
+
+def write_patch(ops: Iterator[Op], out: TextIO) -> int:
+    """Write a patch as a JSON array, an operation per line, as it is built
+
+    :return: Number of operations written
+    :rtype: int
+    """
+    count: int = 0
+    out.write("[")
+    for count, op in enumerate(ops, 1):
+        out.write(("\n" if count == 1 else ",\n") + json.dumps(op))
+    out.write("\n]\n" if count else "]\n")
+    out.flush()
+    return count
+
+
+def _pointer(pointer: Pointer) -> str:
+    return "".join(
+        "/" + token.replace("~", "~0").replace("/", "~1") for token in pointer
+    )
+
+
+def _op(op: str, pointer: Pointer, value: Any = None) -> Op:
+    if op == "remove":
+        return {"op": op, "path": _pointer(pointer)}
+    return {"op": op, "path": _pointer(pointer), "value": value}
+
+
+def _patch_values(
+    v1: Any, v2: Any, pointer: Pointer, node: PathMatcher
+) -> PatchWork:
+    if node.excluded:
+        return
+    if isinstance(v1, dict) and isinstance(v2, dict):
+        yield _patch_dicts(v1, v2, pointer, node)
+    elif isinstance(v1, list) and isinstance(v2, list):
+        yield _patch_lists(v1, v2, pointer, node)
+    elif not _equal_scalars(v1, v2, node.tolerance):
+        yield _op("replace", pointer, v2)
+
+
+def _patch_dicts(
+    d1: Dict[str, Any], d2: Dict[str, Any], pointer: Pointer, node: PathMatcher
+) -> PatchWork:
+    for k, v in d1.items():
+        subnode: PathMatcher = node.key(k)
+        if subnode.excluded:
+            continue
+        if k not in d2:
+            yield _op("remove", (*pointer, str(k)))
+        else:
+            yield _patch_values(v, d2[k], (*pointer, str(k)), subnode)
+    # In the order of `d2`, so equal inputs give equal patches
+    for k, v in d2.items():
+        if k not in d1 and not node.key(k).excluded:
+            yield _op("add", (*pointer, str(k)), v)
+
+
+def _patch_lists(
+    l1: List[Any], l2: List[Any], pointer: Pointer, node: PathMatcher
+) -> PatchWork:
+    element: PathMatcher = node.element()
+    if element.excluded:
+        return
+    if node.list_index is None and node.tolerance is not None:
+        if numeric_array(l1) is not None and numeric_array(l2) is not None:
+            yield from _patch_numeric_lists(l1, l2, pointer, node.tolerance)
+            return
+    # The position in the list as patched so far, removals leaving it and
+    #  additions, and paired elements, passing it
+    at: int = 0
+    for i, j in alignment(l1, l2, *_list_keys(l1, l2, node.list_index)):
+        if j is None:
+            yield _op("remove", (*pointer, str(at)))
+            continue
+        if i is None:
+            yield _op("add", (*pointer, str(at)), l2[j])
+        else:
+            yield _patch_values(l1[i], l2[j], (*pointer, str(at)), element)
+        at += 1
+
+
+def _patch_numeric_lists(
+    l1: List[Any], l2: List[Any], pointer: Pointer, tolerance: Tolerance
+) -> Iterator[Op]:
+    n: int = min(len(l1), len(l2))
+    for i in range(n):
+        if not _equal_scalars(l1[i], l2[i], tolerance):
+            yield _op("replace", (*pointer, str(i)), l2[i])
+    for _ in range(n, len(l1)):
+        yield _op("remove", (*pointer, str(n)))
+    for j in range(n, len(l2)):
+        yield _op("add", (*pointer, str(j)), l2[j])
+
+
+def _list_keys(
+    l1: List[Any], l2: List[Any], list_index: Optional[str]
+) -> Tuple[Sequence[Hashable], Sequence[Hashable]]:
+    if list_index is None:
+        return keys_of(l1, l2)
+    return _keyed(l1, list_index), _keyed(l2, list_index)
+
+
+def _keyed(lst: List[Any], list_index: str) -> List[Hashable]:
+    # Elements with the list index align by its value, any others by value
+    return [
+        (True, e[list_index])
+        if isinstance(e, dict)
+        and list_index in e
+        and isinstance(e[list_index], Hashable)
+        else (False, canonical(e))
+        for e in lst
+    ]
+
+
+def _equal_scalars(v1: Any, v2: Any, tolerance: Optional[Tolerance]) -> bool:
+    # An `int` becoming a `float` is a change, so is patched, unless within a
+    #  tolerance
+    if tolerance is not None and type(v1) in _NUMBERS and type(v2) in _NUMBERS:
+        return close(v1, v2, tolerance)
+    return type(v1) is type(v2) and v1 == v2
+
+
+def apply_patch(document: Any, patch: List[Op], in_place: bool = False) -> Any:
+    """Apply an RFC 6902 JSON Patch, of any operations, to a document
+
+    Unless `in_place`, the document is left as it was: each container on the
+     path of an operation is copied the first time it is changed, and only
+     then, so the cost is that of the containers the patch touches rather
+     than of the whole document
+
+    Tokens naming keys of a mapping are matched to its `int` keys, as YAML
+     allows, if no string key matches; keys added are strings
+
+    :param document: Any, the document to patch
+    :param patch: List[Dict[str, Any]], the operations to apply in order
+    :param in_place: bool, whether to change the document, and any values
+        the patch adds, themselves
+
+    :raises ValueError: If an operation is malformed, its path is missing, or
+        a `test` fails
+
+    :return: The patched document
+    :rtype: Any
+    """
+    applier: _Applier = _Applier(document, in_place)
+    for n, op in enumerate(patch):
+        try:
+            applier.apply(op)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Failed to apply operation {n} ({op}): {e!r}")
+    return applier.root[0]
+
+
+class _Applier:
+    """The document as patched so far, within a holder so that the root may
+    be replaced as any other value"""
+
+    def __init__(self, document: Any, in_place: bool):
+        self.root: List[Any] = [document]
+        self.in_place: bool = in_place
+        # Containers copied by this patch, by id, which it may then change;
+        #  held so no other object is given their ids
+        self.owned: Dict[int, Any] = {id(self.root): self.root}
+
+    def apply(self, op: Op):
+        kind: str = op["op"]
+        tokens: List[str] = _tokens(op["path"])
+        if kind == "add":
+            self._add(tokens, op["value"])
+        elif kind == "remove":
+            self._remove(tokens)
+        elif kind == "replace":
+            parent, token = self._parent(tokens)
+            _get(parent, token)
+            _set(parent, token, op["value"])
+        elif kind == "move":
+            source: List[str] = _tokens(op["from"])
+            if tokens[: len(source)] == source and tokens != source:
+                raise ValueError("Cannot move a value into itself")
+            self._add(tokens, self._remove(source))
+        elif kind == "copy":
+            parent, token = self._parent(_tokens(op["from"]), copy=False)
+            # Copied whole, as changes to either must not reach the other
+            self._add(tokens, deepcopy(_get(parent, token)))
+        elif kind == "test":
+            parent, token = self._parent(tokens, copy=False)
+            if not _json_equal(_get(parent, token), op["value"]):
+                raise ValueError("Test failed")
+        else:
+            raise ValueError(f"Unknown operation ({kind})")
+
+    def _parent(self, tokens: List[str], copy: bool = True) -> Tuple[Any, str]:
+        """The container of the value at `tokens`, copied, with any of its
+        ancestors, if not yet owned, and the token of the value within it"""
+        # The document is the first, and only, element of the holder
+        tokens = ["0", *tokens]
+        container: Any = self.root
+        for token in tokens[:-1]:
+            child: Any = _get(container, token)
+            if copy and not self.in_place and id(child) not in self.owned:
+                if not isinstance(child, (dict, list)):
+                    raise TypeError(f"Not a container at ({token})")
+                child = child.copy()
+                self.owned[id(child)] = child
+                _set(container, token, child)
+            container = child
+        return container, tokens[-1]
+
+    def _add(self, tokens: List[str], value: Any):
+        parent, token = self._parent(tokens)
+        if isinstance(parent, list) and parent is not self.root:
+            index: int = len(parent) if token == "-" else _index(token)
+            if index > len(parent):
+                raise IndexError(f"Index out of range ({token})")
+            parent.insert(index, value)
+        else:
+            _set(parent, token, value)
+
+    def _remove(self, tokens: List[str]) -> Any:
+        if not tokens:
+            raise ValueError("Cannot remove the document")
+        parent, token = self._parent(tokens)
+        value: Any = _get(parent, token)
+        if isinstance(parent, list):
+            del parent[_index(token)]
+        else:
+            del parent[_key(parent, token)]
+        return value
+
+
+def _tokens(pointer: str) -> List[str]:
+    if not pointer:
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"Not a JSON Pointer ({pointer})")
+    return [
+        token.replace("~1", "/").replace("~0", "~")
+        for token in pointer[1:].split("/")
+    ]
+
+
+def _index(token: str) -> int:
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise ValueError(f"Not a list index ({token})")
+    return int(token)
+
+
+def _key(container: Dict[Any, Any], token: str) -> Any:
+    # Mappings from YAML may have `int` keys, which a pointer holds as
+    #  strings, so a token not itself a key is that of an `int` key if any
+    if token not in container and token.lstrip("-").isdigit():
+        key: int = int(token)
+        if key in container and str(key) == token:
+            return key
+    return token
+
+
+def _get(container: Any, token: str) -> Any:
+    if isinstance(container, list):
+        return container[_index(token)]
+    return container[_key(container, token)]
+
+
+def _set(container: Any, token: str, value: Any):
+    if isinstance(container, list):
+        container[_index(token)] = value
+    else:
+        container[_key(container, token)] = value
+
+
+def _json_equal(v1: Any, v2: Any) -> bool:
+    stack: List[Tuple[Any, Any]] = [(v1, v2)]
+    while stack:
+        a, b = stack.pop()
+        if isinstance(a, dict) and isinstance(b, dict):
+            if a.keys() != b.keys():
+                return False
+            stack.extend((a[k], b[k]) for k in a)
+        elif isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                return False
+            stack.extend(zip(a, b))
+        elif type(a) in _NUMBERS and type(b) in _NUMBERS:
+            if a != b:
+                return False
+        elif type(a) is not type(b) or a != b:
+            return False
+    return True
+
+
+def main(argv: List[str]) -> ExitCode:
+    parser = ArgumentParser(
+        prog="odiff apply",
+        epilog="Pointer tokens match integer keys of YAML mappings where no"
+        " string key does; keys added, and those of the JSON written, are"
+        " strings",
+    )
+    parser.add_argument("document", help="JSON or YAML file to patch")
+    parser.add_argument("patch", help="JSON Patch file, as `-o json-patch`")
+    parser.add_argument(
+        "--output",
+        "-o",
+        required=False,
+        default=None,
+        help="file to which to write the patched document, else stdout",
+    )
+    parsed = parser.parse_args(argv)
+    try:
+        document, err = load_file(parsed.document)
+        if err:
+            print(
+                f"Failed to read document ({parsed.document}): {err}",
+                file=sys.stderr,
+            )
+            return ExitCode.USER_FAULT
+        with open(parsed.patch, "rb") as f:
+            patch: Any = json.load(f)
+    except OSError as e:
+        print(f"Failed to read file: {e}", file=sys.stderr)
+        return ExitCode.FILE_IO
+    except ValueError as e:
+        print(f"Failed to read patch ({parsed.patch}): {e}", file=sys.stderr)
+        return ExitCode.USER_FAULT
+    if not isinstance(patch, list):
+        print(f"Patch not a list ({parsed.patch})", file=sys.stderr)
+        return ExitCode.USER_FAULT
+    try:
+        patched: Any = apply_patch(document, patch, in_place=True)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return ExitCode.USER_FAULT
+    out: str = json.dumps(patched, indent=2) + "\n"
+    if parsed.output is None:
+        sys.stdout.write(out)
+        return ExitCode.CLEAN
+    try:
+        with open(parsed.output, "w") as f:
+            f.write(out)
+    except OSError as e:
+        print(f"Failed to write file ({parsed.output}): {e}", file=sys.stderr)
+        return ExitCode.FILE_IO
+    return ExitCode.CLEAN
+
+
+if __name__ == "__main__":
+    exit(main(sys.argv[1:]))
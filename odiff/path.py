@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from odiff.options import OdiffConfig, Tolerance
+
+
+class Index(NamedTuple):
+    """A path segment selecting list element(s), rendered as `[value]`"""
+
+    value: Hashable = ""
+
+
+ELEMENTS: Index = Index()
+
+type Path = Tuple[Any, ...]
+
+_TOKEN_RE = re.compile(r"\[[^\]]*\]|[^.\[]+")
+
+_INDEX_RE = re.compile(r"\[[^\]]*\]")
+
+
+def render_path(path: Path) -> str:
+    """Render a tuple of segments into the JQ-ish form, sans leading `.`"""
+    s: str = ""
+    for segment in path:
+        if isinstance(segment, Index):
+            s += f"[{segment.value}]"
+        elif s:
+            s += f".{segment}"
+        else:
+            s += str(segment)
+    return s
+
+
+def path_key(rendered: str) -> str:
+    """Generalise a rendered path to the form of the config, every list
+    element `[]`, e.g. `delta[Ct2fhriU].key0` to `.delta[].key0`, and
+    `[0].key0` of a top-level list to `.[].key0`"""
+    return "." + _INDEX_RE.sub("[]", rendered)
+
+
+def _tokenize(key: str) -> List[str]:
+    return _TOKEN_RE.findall(key)
+
+
+class PathMatcher:
+    """Trie of the configured paths, descended alongside the objects
+
+    Each node knows whether its path is excluded, which list index, if any,
+     applies to it, whether an unkeyed list there is ordered, and within what
+     tolerance numbers there are equal, so none requires building the path
+     key
+
+    :param excluded: Optional[str], the exclusion listing the path, if any
+    :param list_index: Optional[str], key by which to align list elements
+    :param ordered: bool, whether to align unkeyed list elements in order
+        rather than compare them as multisets
+    :param tolerance: Optional[Tolerance], within which numbers, and the
+        elements of numeric lists, compared by position, are equal
+    :param empty: Optional[PathMatcher], node of any path not in the trie,
+        :data:`EMPTY` or, when every list is ordered, :data:`ORDERED`
+    """
+
+    __slots__ = (
+        "children",
+        "elements",
+        "excluded",
+        "list_index",
+        "ordered",
+        "tolerance",
+        "empty",
+    )
+
+    def __init__(self, empty: Optional[PathMatcher] = None):
+        self.children: Dict[str, PathMatcher] = {}
+        self.elements: Optional[PathMatcher] = None
+        self.excluded: Optional[str] = None
+        self.list_index: Optional[str] = None
+        self.tolerance: Optional[Tolerance] = None
+        self.empty: PathMatcher = empty if empty is not None else self
+        self.ordered: bool = self.empty.ordered if empty is not None else False
+
+    @staticmethod
+    def compile(config: OdiffConfig) -> PathMatcher:
+        """Build the trie for the exclusions and list indices of `config`
+
+        Equal configurations share the same, immutable, trie so that anything
+         keyed by its nodes remains valid across diffs
+        """
+        return _compile(config_key(config))
+
+    def _insert(self, key: str) -> PathMatcher:
+        node: PathMatcher = self
+        for token in _tokenize(key):
+            if token.startswith("["):
+                if node.elements is None:
+                    node.elements = PathMatcher(self.empty)
+                node = node.elements
+            else:
+                node = node.children.setdefault(token, PathMatcher(self.empty))
+        return node
+
+    def key(self, key: Any) -> PathMatcher:
+        """Descend into the child for a dictionary key"""
+        if not self.children:
+            return self.empty
+        if not isinstance(key, str):
+            key = str(key)
+        if "." not in key and "[" not in key:
+            return self.children.get(key, self.empty)
+        node: PathMatcher = self
+        for token in _tokenize(key):
+            node = node.element() if token.startswith("[") else node.key(token)
+        return node
+
+    def element(self) -> PathMatcher:
+        """Descend into the child for the elements of a list"""
+        return self.elements or self.empty
+
+    def descend(self, path: Path) -> PathMatcher:
+        """Descend through every segment of `path`"""
+        node: PathMatcher = self
+        for segment in path:
+            if isinstance(segment, Index):
+                node = node.element()
+            else:
+                node = node.key(segment)
+        return node
+
+
+EMPTY: PathMatcher = PathMatcher()
+
+ORDERED: PathMatcher = PathMatcher()
+ORDERED.ordered = True
+
+type ConfigKey = Tuple[
+    Tuple[str, ...],
+    Tuple[Tuple[str, str], ...],
+    Tuple[str, ...],
+    bool,
+    Tuple[Tuple[str, float, float], ...],
+]
+
+
+def config_key(config: OdiffConfig) -> ConfigKey:
+    """A hashable key of everything in `config` which affects a diff"""
+    return (
+        tuple(config.exclusions),
+        tuple(sorted(config.list_indices.items())),
+        tuple(config.ordered_lists),
+        config.ordered,
+        tuple(
+            (path, t.absolute, t.relative)
+            for path, t in sorted(config.tolerances.items())
+        ),
+    )
+
+
+@lru_cache(maxsize=32)
+def _compile(key: ConfigKey) -> PathMatcher:
+    exclusions, list_indices, ordered_lists, ordered, tolerances = key
+    root: PathMatcher = PathMatcher(ORDERED if ordered else EMPTY)
+    for exclusion in exclusions:
+        root._insert(exclusion).excluded = exclusion or "."
+    for path, list_index in list_indices:
+        root._insert(path).list_index = list_index
+    for path in ordered_lists:
+        root._insert(path).ordered = True
+    for path, absolute, relative in tolerances:
+        root._insert(path).tolerance = Tolerance(absolute, relative)
+    return root
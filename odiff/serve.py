@@ -0,0 +1,216 @@
+import errno
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from logging import INFO, Logger
+from typing import Any, Dict, List, Optional
+
+from odiff.client import default_socket_path
+from odiff.logger import get_logger
+from odiff.options import OdiffConfig, OutputType
+from odiff.session import SESSION_MAX_ENTRIES, OdiffSession
+from odiff.util import ExitCode
+
+log: Logger = get_logger("serve")
+
+BACKLOG = 64
+
+
+def handle_request(
+    session: OdiffSession, req: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run one request against the session, capturing rather than raising
+    failures
+
+    Requests and responses are JSON objects, one per line of a connection;
+     requests hold:
+
+    - `left`, `right`: paths of the files to diff
+    - `config`: path of a YAML config file, optional
+    - `list_indices`, `exclusions`: added to those of the config, optional
+    - `output`: an :class:`odiff.options.OutputType`, defaults to `json`
+    - `raw`, `quiet`, `max_discrepancies`: as the CLI options, optional
+
+    Responses hold the `status`, an :class:`odiff.util.ExitCode`, and either
+     the `output` and the `count` of discrepancies written, or an `error`
+    """
+    try:
+        base: OdiffConfig = (
+            session.config(req["config"])
+            if req.get("config")
+            else OdiffConfig()
+        )
+        # The session's config is shared, so is copied before being added to
+        config: OdiffConfig = replace(
+            base,
+            list_indices={
+                **base.list_indices,
+                **(req.get("list_indices") or {}),
+            },
+            exclusions=[*base.exclusions, *(req.get("exclusions") or [])],
+        )
+        if req.get("quiet"):
+            found = next(
+                session.iter_diff(req["left"], req["right"], config, 1), None
+            )
+            status: ExitCode = (
+                ExitCode.DISCREPANCIES if found else ExitCode.CLEAN
+            )
+            return {"status": status, "output": "", "count": int(bool(found))}
+        output, count = session.render(
+            req["left"],
+            req["right"],
+            config,
+            OutputType(req.get("output") or OutputType.JSON),
+            bool(req.get("raw")),
+            limit=req.get("max_discrepancies"),
+        )
+        return {"status": ExitCode.CLEAN, "output": output, "count": count}
+    except (KeyError, OSError, ValueError) as e:
+        return {
+            "status": ExitCode.USER_FAULT,
+            "error": f"Failed to diff: {e}",
+        }
+    except Exception as e:
+        return {"status": ExitCode.INTERNAL_FAULT, "error": repr(e)}
+
+
+def _serve_connection(session: OdiffSession, conn: socket.socket):
+    with conn, conn.makefile("rwb") as f:
+        for line in f:
+            f.write(json.dumps(_respond(session, line)).encode() + b"\n")
+            f.flush()
+
+
+def _respond(session: OdiffSession, line: bytes) -> Dict[str, Any]:
+    try:
+        req: Any = json.loads(line)
+    except ValueError as e:
+        return {"status": ExitCode.USER_FAULT, "error": f"Invalid request: {e}"}
+    if not isinstance(req, dict):
+        return {"status": ExitCode.USER_FAULT, "error": "Request not an object"}
+    return handle_request(session, req)
+
+
+def serve(
+    socket_path: str, session: OdiffSession, workers: Optional[int] = None
+) -> ExitCode:
+    """Serve diffs on a Unix domain socket until interrupted or terminated
+
+    Connections are served concurrently by a pool of threads sharing the
+     session, so its files stay parsed between requests; the socket is
+     readable and writable by the current user alone
+
+    :param socket_path: str, path at which to create the socket, replacing
+        a stale socket there, though nothing else
+    :param session: :class:`odiff.session.OdiffSession`, the warm caches
+    :param workers: Optional[int], threads serving connections, defaults to
+        that of :class:`concurrent.futures.ThreadPoolExecutor`
+
+    :return: Exit code once interrupted, or FILE_IO if the path is taken
+    :rtype: ExitCode
+    """
+    if not _remove_stale_socket(socket_path):
+        return ExitCode.FILE_IO
+    listener: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask: int = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(umask)
+    listener.listen(BACKLOG)
+    # Terminated as when interrupted, so the socket is removed either way
+    signal.signal(signal.SIGTERM, _interrupt)
+    log.info(f"Listening on {socket_path}")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                conn, _ = listener.accept()
+                executor.submit(_serve_connection, session, conn)
+    except KeyboardInterrupt:
+        log.info("Interrupted, stopping")
+    finally:
+        listener.close()
+        os.unlink(socket_path)
+    return ExitCode.CLEAN
+
+
+def _remove_stale_socket(socket_path: str) -> bool:
+    """Remove a socket left by a server no longer listening on it; anything
+    else at the path, or a server still listening, is left as it is
+
+    :return: Whether the path is now free
+    :rtype: bool
+    """
+    try:
+        mode: int = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(mode):
+        log.error(f"Not a socket, refusing to replace ({socket_path})")
+        return False
+    probe: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError as e:
+        if e.errno != errno.ECONNREFUSED:
+            log.error(f"Failed to probe socket ({socket_path}): {e}")
+            return False
+    else:
+        log.error(f"Server already listening on ({socket_path})")
+        return False
+    finally:
+        probe.close()
+    os.unlink(socket_path)
+    return True
+
+
+def _interrupt(signum: int, frame: Any):
+    raise KeyboardInterrupt
+
+
+def main(argv: List[str]) -> ExitCode:
+    parser = ArgumentParser(prog="odiff serve")
+    parser.add_argument(
+        "--socket",
+        "-s",
+        required=False,
+        default=default_socket_path(),
+        help="path of the socket on which to listen",
+    )
+    parser.add_argument(
+        "--workers",
+        "-j",
+        required=False,
+        type=int,
+        default=None,
+        help="threads serving connections",
+    )
+    parser.add_argument(
+        "--max-entries",
+        required=False,
+        type=int,
+        default=SESSION_MAX_ENTRIES,
+        help="parsed files, and configs, kept between requests",
+    )
+    parser.add_argument(
+        "--merkle",
+        required=False,
+        action="store_true",
+        default=False,
+        help="digest, and keep the digests of, files to skip equal subtrees",
+    )
+    parsed = parser.parse_args(argv)
+    log.setLevel(INFO)
+    session: OdiffSession = OdiffSession(parsed.max_entries, parsed.merkle)
+    return serve(parsed.socket, session, parsed.workers)
+
+
+if __name__ == "__main__":
+    exit(main(sys.argv[1:]))
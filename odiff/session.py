@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from io import StringIO
+from logging import Logger
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple
+
+from odiff.discrepancy import Discrepancy
+from odiff.loader import load_file
+from odiff.logger import get_logger
+from odiff.odiff import iter_odiff
+from odiff.options import (
+    OdiffConfig,
+    OutputType,
+    SummaryOptions,
+    TableOptions,
+    UnifiedDiffOptions,
+)
+from odiff.path import ConfigKey, config_key
+from odiff.writers import writer_for
+
+if TYPE_CHECKING:
+    from odiff.merkle import DigestIndex
+
+log: Logger = get_logger("session")
+
+SESSION_MAX_ENTRIES = 64
+
+type StatKey = Tuple[int, int, int]
+
+
+class _Entry:
+    """A cached file and, for each config under which it was diffed, its
+    digests"""
+
+    __slots__ = ("stat", "value", "digests")
+
+    def __init__(self, stat: StatKey, value: Any):
+        self.stat: StatKey = stat
+        self.value: Any = value
+        self.digests: Dict[ConfigKey, DigestIndex] = {}
+
+
+class _LRU:
+    """Files keyed by path, reloaded when their stat changes, the least
+    recently used evicted beyond `max_entries`"""
+
+    def __init__(self, load: Callable[[str], Any], max_entries: int):
+        self.load: Callable[[str], Any] = load
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.lock: Lock = Lock()
+
+    def get(self, fname: str) -> _Entry:
+        fname = os.path.realpath(fname)
+        st: os.stat_result = os.stat(fname)
+        stat: StatKey = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with self.lock:
+            entry: Optional[_Entry] = self.entries.get(fname)
+            if entry is not None and entry.stat == stat:
+                self.entries.move_to_end(fname)
+                return entry
+        # Loaded without the lock, so other files are served meanwhile; two
+        #  requests for the same changed file may both load it
+        log.debug(f"Loading ({fname})")
+        entry = _Entry(stat, self.load(fname))
+        with self.lock:
+            self.entries[fname] = entry
+            self.entries.move_to_end(fname)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+
+class OdiffSession:
+    """Parsed files and configs kept warm between diffs
+
+    For services diffing many files against the same baselines and configs:
+     each file is parsed once, and again only when its stat changes, so only
+     the files new to each diff are parsed; any number of threads may diff
+     concurrently
+
+    :param max_entries: int, files, and configs, to keep, the least recently
+        used beyond them are evicted
+    :param merkle: bool, whether to digest files, also kept, so subtrees with
+        equal digests are skipped rather than walked
+    """
+
+    def __init__(
+        self, max_entries: int = SESSION_MAX_ENTRIES, merkle: bool = False
+    ):
+        self.merkle: bool = merkle
+        self._objects: _LRU = _LRU(_load_object, max_entries)
+        self._configs: _LRU = _LRU(_load_config, max_entries)
+
+    def config(self, fname: str) -> OdiffConfig:
+        """The config of a YAML file, as read by `--config`; treat it as
+        read-only, it is shared by every caller"""
+        return self._configs.get(fname).value
+
+    def load(self, fname: str) -> Any:
+        """The object of a JSON or YAML file, as read by the CLI; treat it as
+        read-only, it is shared by every caller"""
+        return self._objects.get(fname).value
+
+    def iter_diff(
+        self,
+        lfname: str,
+        rfname: str,
+        config: Optional[OdiffConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Discrepancy]:
+        """Lazily find the discrepancies between two files, as
+        :func:`odiff.odiff.iter_odiff` would
+
+        :raises OSError: If either file cannot be read
+        :raises ValueError: If either file cannot be parsed
+        """
+        config = config or OdiffConfig()
+        left: _Entry = self._objects.get(lfname)
+        right: _Entry = self._objects.get(rfname)
+        ldigests: Optional[DigestIndex] = None
+        rdigests: Optional[DigestIndex] = None
+        if self.merkle:
+            ldigests = _digests(left, config)
+            rdigests = _digests(right, config)
+        return iter_odiff(
+            left.value,
+            right.value,
+            config,
+            lfname,
+            rfname,
+            ldigests=ldigests,
+            rdigests=rdigests,
+            limit=limit,
+        )
+
+    def render(
+        self,
+        lfname: str,
+        rfname: str,
+        config: Optional[OdiffConfig] = None,
+        output_type: OutputType = OutputType.JSON,
+        raw: bool = False,
+        unified_diff: Optional[UnifiedDiffOptions] = None,
+        limit: Optional[int] = None,
+        table: Optional[TableOptions] = None,
+        summary: Optional[SummaryOptions] = None,
+    ) -> Tuple[str, int]:
+        """Diff two files and render the discrepancies as the CLI would
+
+        A JSON Patch is written whole, whatever the `limit`, and its count is
+         that of its operations
+
+        :return: The output, and the number of discrepancies written
+        :rtype: Tuple[str, int]
+        """
+        out: StringIO = StringIO()
+        if output_type == OutputType.JSON_PATCH:
+            from odiff.patch import iter_patch, write_patch
+
+            config = config or OdiffConfig()
+            ops = iter_patch(self.load(lfname), self.load(rfname), config)
+            count: int = write_patch(ops, out)
+            return out.getvalue(), count
+        # Diffed to one past the limit, so the writer marks any truncation
+        peek: Optional[int] = None if limit is None else limit + 1
+        count: int = writer_for(
+            output_type, out, raw, unified_diff, None, table, summary, limit
+        ).write_all(self.iter_diff(lfname, rfname, config, peek))
+        return out.getvalue(), count
+
+
+def _load_object(fname: str) -> Any:
+    obj, err = load_file(fname)
+    if err and not isinstance(obj, str):
+        raise ValueError(f"Failed to read object file ({fname})")
+    return obj
+
+
+def _load_config(fname: str) -> OdiffConfig:
+    from argparse import ArgumentTypeError
+
+    from odiff.cli import config_from_fname
+
+    try:
+        return config_from_fname(fname)
+    except ArgumentTypeError as e:
+        raise ValueError(str(e))
+
+
+def _digests(entry: _Entry, config: OdiffConfig) -> DigestIndex:
+    from odiff.merkle import DigestIndex
+
+    key: ConfigKey = config_key(config)
+    index: Optional[DigestIndex] = entry.digests.get(key)
+    if index is None:
+        index = entry.digests[key] = DigestIndex(entry.value, config)
+    return index
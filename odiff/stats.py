@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import heapq
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import count
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+from odiff.path import Path, render_path
+
+LARGEST_LISTS = 10
+
+T = TypeVar("T")
+
+_TIE = count()
+
+
+@dataclass
+class Stats:
+    """Counters and phase timings of a diff
+
+    Pass an instance to :func:`odiff.odiff.iter_odiff` (or the loaders and
+     writers) to have it filled in
+
+    :param phases: Dict[str, float], seconds spent in each phase
+    :param nodes: int, pairs of containers walked
+    :param keys: int, dictionary keys compared
+    :param keyed_elements: int, list elements aligned by a list index
+    :param multiset_elements: int, list elements compared as multisets
+    :param ordered_elements: int, list elements aligned in order
+    :param numeric_elements: int, list elements compared as numeric arrays
+    :param exclusions: int, discrepancies ignored by an exclusion
+    :param excluded_by: Dict[str, int], discrepancies ignored by each
+        exclusion
+    :param bytes_parsed: int, bytes of the input files parsed
+    :param largest_lists: List[Tuple[int, int, Path]], heap of the longest
+        lists walked, with a tie-breaker and their path
+    """
+
+    phases: Dict[str, float] = field(default_factory=dict)
+    nodes: int = 0
+    keys: int = 0
+    keyed_elements: int = 0
+    multiset_elements: int = 0
+    ordered_elements: int = 0
+    numeric_elements: int = 0
+    exclusions: int = 0
+    excluded_by: Dict[str, int] = field(default_factory=dict)
+    bytes_parsed: int = 0
+    largest_lists: List[Tuple[int, int, Path]] = field(default_factory=list)
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to the phase `name`"""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_bytes(self, n: int):
+        with self._lock:
+            self.bytes_parsed += n
+
+    def timed(self, name: str, it: Iterator[T]) -> Iterator[T]:
+        """Wrap an iterator, adding the time spent producing each item to the
+        phase `name`, but not the time its consumer spends between items"""
+        clock: Callable[[], float] = time.perf_counter
+        while True:
+            start: float = clock()
+            try:
+                item: T = next(it)
+            except StopIteration:
+                self.add_time(name, clock() - start)
+                return
+            self.add_time(name, clock() - start)
+            yield item
+
+    def list_seen(self, path: Path, length: int):
+        """Record a list walked, keeping only the longest"""
+        entry: Tuple[int, int, Path] = (length, next(_TIE), path)
+        if len(self.largest_lists) < LARGEST_LISTS:
+            heapq.heappush(self.largest_lists, entry)
+        elif length > self.largest_lists[0][0]:
+            heapq.heapreplace(self.largest_lists, entry)
+
+    def merge(self, other: Stats, prefix: Path = ()):
+        """Add the counters and timings of `other` to these, prefixing the
+        paths of its lists by `prefix`"""
+        for name, seconds in other.phases.items():
+            self.add_time(name, seconds)
+        self.nodes += other.nodes
+        self.keys += other.keys
+        self.keyed_elements += other.keyed_elements
+        self.multiset_elements += other.multiset_elements
+        self.ordered_elements += other.ordered_elements
+        self.numeric_elements += other.numeric_elements
+        self.exclusions += other.exclusions
+        for exclusion, n in other.excluded_by.items():
+            self.excluded_by[exclusion] = self.excluded_by.get(exclusion, 0) + n
+        self.add_bytes(other.bytes_parsed)
+        for length, _, path in other.largest_lists:
+            self.list_seen((*prefix, *path), length)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The Stats as a JSON-serializable dictionary"""
+        return {
+            "phases": dict(self.phases),
+            "nodes": self.nodes,
+            "keys": self.keys,
+            "keyed_elements": self.keyed_elements,
+            "multiset_elements": self.multiset_elements,
+            "ordered_elements": self.ordered_elements,
+            "numeric_elements": self.numeric_elements,
+            "exclusions": self.exclusions,
+            "excluded_by": dict(self.excluded_by),
+            "bytes_parsed": self.bytes_parsed,
+            "largest_lists": [
+                {"path": f".{render_path(path)}", "length": length}
+                for length, _, path in sorted(self.largest_lists, reverse=True)
+            ],
+        }
+
+    def report(self, timings_only: bool = False) -> str:
+        """Human-readable report, of the phase timings only if requested"""
+        lines: List[str] = ["Timings:"]
+        lines.extend(
+            f"  {name:<12} {seconds * 1000:>12.2f} ms"
+            for name, seconds in self.phases.items()
+        )
+        if timings_only:
+            return "\n".join(lines)
+        lines.append("Counters:")
+        for name, value in self.to_dict().items():
+            if isinstance(value, int):
+                lines.append(f"  {name:<18} {value:>12}")
+        if self.largest_lists:
+            lines.append("Largest lists:")
+            lines.extend(
+                f"  {length:>8}  .{render_path(path)}"
+                for length, _, path in sorted(self.largest_lists, reverse=True)
+            )
+        return "\n".join(lines)
+
+
+def profiled(fname: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run `fn` under cProfile, dumping the stats to `fname` when done"""
+    import cProfile
+
+    profile: cProfile.Profile = cProfile.Profile()
+    try:
+        return profile.runcall(fn, *args, **kwargs)
+    finally:
+        profile.dump_stats(fname)
@@ -0,0 +1,279 @@
+import codecs
+import json
+from hashlib import blake2b
+from logging import Logger
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from odiff.discrepancy import Discrepancies, Discrepancy
+from odiff.logger import get_logger
+from odiff.odiff import ExclusionLog, _simple_diff_lists, diff_values
+from odiff.options import OdiffConfig
+from odiff.path import ELEMENTS, Index, PathMatcher, render_path
+from odiff.stats import Stats
+
+log: Logger = get_logger("stream")
+
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = " \t\r\n\ufeff"
+_DELIMITERS = _WHITESPACE + ",]}"
+
+type Record = Tuple[int, int, Any]
+type RecordIndex = Dict[Hashable, Tuple[int, int, bytes]]
+
+
+class _ArrayReader:
+    """Incremental reader of the elements of a top-level JSON array
+
+    Only the unparsed remainder of the current chunk is held in memory, the
+     byte offset of each element is tracked so it can be re-read later;
+     elements are decoded in place, `buf[start:]` being unconsumed, and the
+     consumed prefix is dropped only when the buffer is refilled
+    """
+
+    def __init__(self, f: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self.f: BinaryIO = f
+        self.chunk_size: int = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buf: str = ""
+        self.start: int = 0
+        self.base: int = 0
+        self.pos: int = 0
+        self.eof: bool = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.start:
+            self.buf = self.buf[self.start :]
+            self.pos -= self.start
+            self.start = 0
+        chunk: bytes = self.f.read(max(self.chunk_size, len(self.buf)))
+        self.eof = not chunk
+        self.buf += self.decoder.decode(chunk, final=self.eof)
+        return True
+
+    def _consume(self, end: int):
+        consumed: str = self.buf[self.start : end]
+        self.base += (
+            len(consumed) if consumed.isascii() else len(consumed.encode())
+        )
+        self.start = self.pos = end
+
+    def _skip_whitespace(self) -> str:
+        while True:
+            while (
+                self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE
+            ):
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self._consume(self.pos)
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        c: str = self._skip_whitespace()
+        if not c or c not in chars:
+            raise ValueError(
+                f"Expected one of '{chars}' at byte"
+                f" {self.base + self.pos - self.start}"
+            )
+        self.pos += 1
+        return c
+
+    def _decode(self) -> Tuple[Any, int]:
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buf, self.pos)
+                if self.eof or self._delimited(value, end):
+                    return value, end
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def _delimited(self, value: Any, end: int) -> bool:
+        # A number may have been cut short by the end of the buffer
+        if end >= len(self.buf):
+            return False
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return self.buf[end] in _DELIMITERS
+        return True
+
+    def __iter__(self) -> Iterator[Record]:
+        self._expect("[")
+        if self._skip_whitespace() == "]":
+            return
+        while True:
+            self._consume(self.pos)
+            value, end = self._decode()
+            offset: int = self.base
+            self._consume(end)
+            yield offset, self.base - offset, value
+            if self._expect(",]") == "]":
+                return
+            self._skip_whitespace()
+
+
+def iter_json_array(
+    f: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Record]:
+    """Iterate the elements of a JSON array file without loading it whole
+
+    :param f: BinaryIO, the file, opened in binary mode
+    :param chunk_size: int, number of bytes to read at a time
+
+    :return: Iterator of the byte offset, byte length, and parsed element
+    :rtype: Iterator[Tuple[int, int, Any]]
+    """
+    return iter(_ArrayReader(f, chunk_size))
+
+
+def record_digest(record: Any) -> bytes:
+    """Digest of a record, insensitive to key order and formatting"""
+    serialized: str = json.dumps(
+        record, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return blake2b(serialized.encode(), digest_size=16).digest()
+
+
+def stream_odiff(
+    lfname: str,
+    rfname: str,
+    config: OdiffConfig,
+    chunk_size: int = CHUNK_SIZE,
+) -> Discrepancies:
+    return list(iter_stream_odiff(lfname, rfname, config, chunk_size))
+
+
+def iter_stream_odiff(
+    lfname: str,
+    rfname: str,
+    config: OdiffConfig,
+    chunk_size: int = CHUNK_SIZE,
+    limit: Optional[int] = None,
+    stats: Optional[Stats] = None,
+) -> Iterator[Discrepancy]:
+    """Diff two files holding top-level JSON arrays of keyed objects
+
+    The first file is indexed by the list index configured for `.` as a map
+     of each key to the offset, length, and digest of its record, the second
+     file is then streamed against that index; only records which differ are
+     re-read and diffed as with :func:`odiff.odiff.odiff` so memory is bounded
+     by the number of differences rather than the size of the inputs
+
+    Records without the key are gathered and compared as any other unkeyed
+     list elements
+
+    :param lfname: str, the "left" file
+    :param rfname: str, the "right" file
+    :param config: Configuration which must have a list index for `.`
+    :param chunk_size: int, number of bytes to read at a time
+    :param limit: Optional[int], number of discrepancies after which to stop
+        reading, all are found if None
+    :param stats: Optional[Stats], counters to which to add the exclusions
+
+    :return: Iterator of discrepancies
+    :rtype: Iterator[Discrepancy]
+    """
+    matcher: PathMatcher = PathMatcher.compile(config)
+    list_key = matcher.list_index
+    if not list_key:
+        raise ValueError("Streaming requires a list index for '.'")
+    exclusions: ExclusionLog = ExclusionLog(config.exclusion_log_limit, stats)
+    for n, d in enumerate(
+        _stream_diff(
+            lfname, rfname, config, matcher, list_key, chunk_size, exclusions
+        ),
+        1,
+    ):
+        d.lfname, d.rfname = lfname, rfname
+        # Reported before the last is yielded, as its consumer stops there
+        if n == limit:
+            exclusions.report()
+            yield d
+            return
+        yield d
+    exclusions.report()
+
+
+def _stream_diff(
+    lfname: str,
+    rfname: str,
+    config: OdiffConfig,
+    matcher: PathMatcher,
+    list_key: str,
+    chunk_size: int,
+    exclusions: ExclusionLog,
+) -> Iterator[Discrepancy]:
+    node: PathMatcher = matcher.element()
+    index: RecordIndex = {}
+    l_non_compliant: List[Any] = []
+    r_non_compliant: List[Any] = []
+    with open(lfname, "rb") as lf, open(rfname, "rb") as rf:
+        for offset, length, record in iter_json_array(lf, chunk_size):
+            if _is_compliant(list_key, record):
+                index[record[list_key]] = (
+                    offset,
+                    length,
+                    record_digest(record),
+                )
+            else:
+                l_non_compliant.append(record)
+        log.debug(f"Indexed {len(index)} records ({lfname})")
+
+        seen: set = set()
+        for _, _, record in iter_json_array(rf, chunk_size):
+            if not _is_compliant(list_key, record):
+                r_non_compliant.append(record)
+                continue
+            k: Hashable = record[list_key]
+            seen.add(k)
+            path = (Index(k),)
+            if k not in index:
+                if node.excluded:
+                    exclusions.excluded(node.excluded, path)
+                    continue
+                yield Discrepancy.sub(render_path(path), record)
+                continue
+            offset, length, digest = index[k]
+            if digest == record_digest(record):
+                continue
+            lf.seek(offset)
+            lrecord: Any = json.loads(lf.read(length))
+            yield from diff_values(
+                lrecord, record, config, path, node, exclusions
+            )
+
+        for k, (offset, length, _) in index.items():
+            if k in seen:
+                continue
+            path = (Index(k),)
+            if node.excluded:
+                exclusions.excluded(node.excluded, path)
+                continue
+            lf.seek(offset)
+            yield Discrepancy.add(
+                render_path(path), json.loads(lf.read(length))
+            )
+
+    yield from _simple_diff_lists((ELEMENTS,), l_non_compliant, r_non_compliant)
+
+
+def _is_compliant(list_key: str, record: Any) -> bool:
+    return (
+        isinstance(record, dict)
+        and list_key in record
+        and isinstance(record[list_key], Hashable)
+    )
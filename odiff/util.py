@@ -1,10 +1,8 @@
-from io import SEEK_SET
 import os
-import json
 from enum import IntEnum
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
-import yaml
+from odiff.loader import load_file
 
 MODULE_DIR: str = os.path.dirname(os.path.realpath(__file__))
 
@@ -15,6 +13,7 @@ class ExitCode(IntEnum):
     INTERNAL_FAULT = 2
     FILE_IO = 3
     MODULE = 4
+    DISCREPANCIES = 5
 
 
 TRUNC_MAX = 100
@@ -27,12 +26,9 @@ def trunc(s: str, n: int = TRUNC_MAX) -> str:
 
 
 def read_yaml_file(fname: str) -> Tuple[Dict, Optional[Exception]]:
-    data: Any = None
-    with open(fname) as f:
-        try:
-            data = yaml.load(f, Loader=yaml.SafeLoader)
-        except Exception as e:
-            return {}, e
+    data, err = load_file(fname)
+    if err:
+        return {}, err
     match data:
         case dict():
             return data, None
@@ -45,36 +41,33 @@ def read_yaml_file(fname: str) -> Tuple[Dict, Optional[Exception]]:
 def read_object_file(
     fname: str,
 ) -> Tuple[List | Dict | str, Optional[Exception]]:
-    data: Any = None
-    with open(fname) as f:
-        err: Optional[Exception] = None
-        try:
-            data = yaml.load(f, Loader=yaml.SafeLoader)
-            return data, None
-        except yaml.YAMLError as e:
-            err = e
-        f.seek(SEEK_SET)
-        try:
-            data = json.load(f)
-            return data, None
-        except json.JSONDecodeError as e:
-            err = e
-        f.seek(SEEK_SET)
-        if err:
-            return f.read(), err
-    match data:
-        case list() | dict():
-            return data, None
-        case _:
-            return {}, Exception(
-                f"Input file not JSON or YAML list or dict: {fname}"
-            )
+    return load_file(fname)
 
 
 def all_dicts(lst: List[Any]) -> bool:
     return all(isinstance(e, dict) for e in lst)
 
 
+def separate_compliant_list(
+    list_key: Optional[str], list_of_dicts: List[Any]
+) -> Tuple[Dict[str, dict], List[Any]]:
+    """Split a list into a map of its elements by `list_key` and the rest"""
+    if not list_key:
+        return {}, list_of_dicts
+    compliant: Dict[str, dict] = {}
+    non_compliant: List[Any] = []
+    for e in list_of_dicts:
+        if (
+            isinstance(e, dict)
+            and list_key in e
+            and isinstance(e[list_key], Hashable)
+        ):
+            compliant[e[list_key]] = e
+        else:
+            non_compliant.append(e)
+    return compliant, non_compliant
+
+
 def multiline_aware_wrap(s: str, indent_wrapped: bool, width: int) -> str:
     lines = []
     for line in s.split("\n"):
@@ -0,0 +1,194 @@
+import json
+import os
+import time
+from logging import Logger
+from typing import Any, Dict, Optional, TextIO, Tuple
+
+from odiff.discrepancy import Discrepancies, Discrepancy
+from odiff.loader import load_file
+from odiff.logger import get_logger
+from odiff.merkle import DigestIndex
+from odiff.odiff import SubtreeMemo, odiff
+from odiff.options import OdiffConfig, OutputType, UnifiedDiffOptions
+from odiff.util import ExitCode
+from odiff.writers import writer_for
+
+log: Logger = get_logger("watch")
+
+POLL_INTERVAL = 0.5
+
+type StatKey = Tuple[int, int, int]
+type DiscrepancyKey = Tuple[str, str, str, str]
+
+
+class WatchedFile:
+    """A parsed file and its digests, reloaded when its stat changes
+
+    :param fname: str, the file to watch
+    :param config: Configuration for index-based comparisons and exclusions
+    """
+
+    def __init__(self, fname: str, config: OdiffConfig):
+        self.fname: str = fname
+        self.config: OdiffConfig = config
+        self.stat: Optional[StatKey] = None
+        self.obj: Any = None
+        self.digests: Optional[DigestIndex] = None
+
+    def poll(self) -> bool:
+        """Reload the file if changed, returning whether it was reloaded
+
+        A file which is missing, or cannot be parsed, such as when part way
+         through being saved, keeps its previous content until changed again
+        """
+        try:
+            st: os.stat_result = os.stat(self.fname)
+        except FileNotFoundError:
+            return False
+        stat: StatKey = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if stat == self.stat:
+            return False
+        self.stat = stat
+        obj, err = load_file(self.fname)
+        if err:
+            log.warning(f"Failed to parse, awaiting a change ({self.fname})")
+            return False
+        self.obj = obj
+        self.digests = DigestIndex(obj, self.config, exact=True)
+        return True
+
+
+class WatchSession:
+    """Two watched files and the discrepancies of their subtrees
+
+    Only a file which changes is parsed and digested again, and only pairs
+     of subtrees whose digests changed are walked again, the discrepancies
+     of every other pair are reused from the previous diff
+
+    :param lfname: str, the "left" file
+    :param rfname: str, the "right" file
+    :param config: Configuration for index-based comparisons and exclusions
+    """
+
+    def __init__(self, lfname: str, rfname: str, config: OdiffConfig):
+        self.config: OdiffConfig = config
+        self.left: WatchedFile = WatchedFile(lfname, config)
+        self.right: WatchedFile = WatchedFile(rfname, config)
+        self.memo: SubtreeMemo = SubtreeMemo()
+
+    def poll(self) -> bool:
+        """Reload either file if changed, returning whether either was and
+        both are loaded"""
+        changed: bool = self.left.poll() | self.right.poll()
+        return (
+            changed
+            and self.left.digests is not None
+            and self.right.digests is not None
+        )
+
+    def diff(self) -> Discrepancies:
+        return odiff(
+            self.left.obj,
+            self.right.obj,
+            self.config,
+            self.left.fname,
+            self.right.fname,
+            ldigests=self.left.digests,
+            rdigests=self.right.digests,
+            memo=self.memo,
+        )
+
+
+def watch(
+    session: WatchSession,
+    output_type: OutputType,
+    out: TextIO,
+    raw: bool = False,
+    unified_diff: Optional[UnifiedDiffOptions] = None,
+    delta: bool = False,
+    interval: float = POLL_INTERVAL,
+) -> ExitCode:
+    """Report the discrepancies of the session each time either file changes
+
+    Files are polled by stat, which works on any filesystem, until
+     interrupted; a file which cannot be parsed is reported once it can be
+
+    :param session: :class:`WatchSession`, the files to watch
+    :param output_type: :class:`odiff.options.OutputType`, report flavour
+    :param out: TextIO, the stream to which to write reports
+    :param raw: bool, whether to display raw objects instead of unified diffs
+    :param unified_diff: Options for any unified diffs displayed
+    :param delta: bool, whether to report only the discrepancies new or
+        resolved since the previous report
+    :param interval: float, seconds between polls
+
+    :return: Exit code once interrupted
+    :rtype: ExitCode
+    """
+    previous: Optional[Dict[DiscrepancyKey, Discrepancy]] = None
+    try:
+        while True:
+            if session.poll():
+                start: float = time.perf_counter()
+                found: Dict[DiscrepancyKey, Discrepancy] = {
+                    _key(d): d for d in session.diff()
+                }
+                ms: float = (time.perf_counter() - start) * 1000
+                heading: str = (
+                    f"{time.strftime('%H:%M:%S')}, {len(found)} discrepancies"
+                    f" in {ms:.1f}ms"
+                )
+                if delta and previous is not None:
+                    _write_section(
+                        f"{heading}, new",
+                        [d for k, d in found.items() if k not in previous],
+                        output_type,
+                        out,
+                        raw,
+                        unified_diff,
+                    )
+                    _write_section(
+                        f"{heading}, resolved",
+                        [d for k, d in previous.items() if k not in found],
+                        output_type,
+                        out,
+                        raw,
+                        unified_diff,
+                    )
+                else:
+                    _write_section(
+                        heading,
+                        list(found.values()),
+                        output_type,
+                        out,
+                        raw,
+                        unified_diff,
+                    )
+                previous = found
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return ExitCode.CLEAN
+
+
+def _key(d: Discrepancy) -> DiscrepancyKey:
+    return (
+        d.variant,
+        d.path,
+        json.dumps(d.lvalue, sort_keys=True, default=repr),
+        json.dumps(d.rvalue, sort_keys=True, default=repr),
+    )
+
+
+def _write_section(
+    heading: str,
+    discrepancies: Discrepancies,
+    output_type: OutputType,
+    out: TextIO,
+    raw: bool,
+    unified_diff: Optional[UnifiedDiffOptions],
+):
+    out.write(f"=== {heading} ===\n")
+    if discrepancies:
+        writer_for(output_type, out, raw, unified_diff).write_all(discrepancies)
+    else:
+        out.flush()
@@ -0,0 +1,363 @@
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from odiff.discrepancy import Discrepancy, Variant
+from odiff.options import (
+    OutputType,
+    SummaryOptions,
+    TableOptions,
+    UnifiedDiffOptions,
+)
+from odiff.path import path_key
+from odiff.stats import Stats
+from odiff.util import PATH_COLUMN_MAX_W, RAW_OBJECT_COLUMN_MAX_W
+
+# Widths of the columns of paged tables, which are not measured
+VARIANT_COLUMN_W = max(len(v) for v in Variant)
+
+# Width of the bar of the busiest row of a summary
+SUMMARY_BAR_W = 20
+
+_SECTION_RE = re.compile(r"\.?(\[\]|[^.\[]+)")
+
+
+class DiscrepancyWriter:
+    """Writes discrepancies to a stream as they are produced
+
+    :param out: TextIO, the stream to which to write
+    :param raw: bool, whether to display raw objects instead of unified diffs
+    :param unified_diff: Options for any unified diffs displayed
+    :param stats: Optional[Stats], to which to add the time spent formatting
+        each discrepancy, and rendering the output on close
+    :param limit: Optional[int], number of discrepancies to write, beyond
+        which the output is truncated, noted in `truncated` and, by writers
+        for people, in the output; the discrepancies should run to one past
+        it, so that whether more exist is known
+    """
+
+    def __init__(
+        self,
+        out: TextIO,
+        raw: bool = False,
+        unified_diff: Optional[UnifiedDiffOptions] = None,
+        stats: Optional[Stats] = None,
+        limit: Optional[int] = None,
+    ):
+        self.out: TextIO = out
+        self.raw: bool = raw
+        self.unified_diff: Optional[UnifiedDiffOptions] = unified_diff
+        self.stats: Optional[Stats] = stats
+        self.limit: Optional[int] = limit
+        self.count: int = 0
+        self.truncated: bool = False
+
+    def write(self, d: Discrepancy):
+        if self.stats is None:
+            self._write(d)
+        else:
+            with self.stats.phase("format"):
+                self._write(d)
+        self.count += 1
+
+    def _write(self, d: Discrepancy):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the output, required for some formats to be valid"""
+        if self.stats is None:
+            self._close()
+        else:
+            with self.stats.phase("render"):
+                self._close()
+
+    def _close(self):
+        self.out.flush()
+
+    def _write_truncation(self):
+        if self.truncated:
+            self.out.write(
+                f"Truncated at {self.count} discrepancies, more exist"
+                " (--max-discrepancies)\n"
+            )
+
+    def write_all(self, discrepancies: Iterable[Discrepancy]) -> int:
+        """Write every discrepancy, up to the limit, then close, returning
+        the count"""
+        for d in discrepancies:
+            if self.limit is not None and self.count >= self.limit:
+                self.truncated = True
+                break
+            self.write(d)
+        self.close()
+        return self.count
+
+
+class JsonWriter(DiscrepancyWriter):
+    """A JSON array, opened on the first write and closed by `close`"""
+
+    def _write(self, d: Discrepancy):
+        self.out.write(",\n" if self.count else "[\n")
+        self.out.write(_indent(json.dumps(d.to_dict(), indent=2)))
+
+    def _close(self):
+        self.out.write("\n]\n" if self.count else "[]\n")
+        super()._close()
+
+
+class JsonLinesWriter(DiscrepancyWriter):
+    """One JSON object per line"""
+
+    def _write(self, d: Discrepancy):
+        self.out.write(json.dumps(d.to_dict()) + "\n")
+
+
+class SimpleWriter(DiscrepancyWriter):
+    def _write(self, d: Discrepancy):
+        self.out.write(str(d) + "\n")
+
+    def _close(self):
+        self._write_truncation()
+        super()._close()
+
+
+class OneLineWriter(DiscrepancyWriter):
+    def _write(self, d: Discrepancy):
+        self.out.write(d.one_line() + "\n")
+
+
+class ObjectWriter(DiscrepancyWriter):
+    """The pretty-printed list, buffered until `close`"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.discrepancies: List[Discrepancy] = []
+
+    def _write(self, d: Discrepancy):
+        self.discrepancies.append(d)
+
+    def _close(self):
+        from pprint import pformat
+
+        self.out.write(pformat(self.discrepancies) + "\n")
+        super()._close()
+
+
+class TableWriter(DiscrepancyWriter):
+    """A table of the discrepancies
+
+    A table of up to a page of rows is buffered until `close` and measured by
+     `tabulate`; longer tables are written a page at a time as they are
+     found, each page a table of its own with columns of fixed widths, so
+     they line up; discrepancies beyond the limit, if any, are counted but not
+     formatted, and summarized after the table
+
+    :param table: Optional[TableOptions], the page size and limit
+    """
+
+    def __init__(self, *args, table: Optional[TableOptions] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.table: TableOptions = table or TableOptions()
+        self.rows: List[List[Any]] = []
+        self.paged: bool = False
+        self.overflow: int = 0
+
+    def _write(self, d: Discrepancy):
+        if self.table.limit is not None and self.count >= self.table.limit:
+            self.overflow += 1
+            return
+        self.rows.append(d.for_tabulation(self.raw, self.unified_diff))
+        if len(self.rows) > self.table.page_size:
+            self.paged = True
+            self._write_page(self.rows[: self.table.page_size])
+            del self.rows[: self.table.page_size]
+
+    def _write_page(self, rows: List[List[Any]]):
+        widths: List[int] = [VARIANT_COLUMN_W, PATH_COLUMN_MAX_W]
+        if self.raw:
+            widths.extend([RAW_OBJECT_COLUMN_MAX_W, RAW_OBJECT_COLUMN_MAX_W])
+        else:
+            widths.append(RAW_OBJECT_COLUMN_MAX_W * 2)
+        separator: str = _rule(widths, "├", "┼", "┤")
+        self.out.write(_rule(widths, "╭", "┬", "╮"))
+        self.out.write(
+            _grid_row(Discrepancy.tabulation_headers(self.raw), widths)
+        )
+        for row in rows:
+            self.out.write(separator)
+            self.out.write(_grid_row(row, widths))
+        self.out.write(_rule(widths, "╰", "┴", "╯"))
+
+    def _close(self):
+        if self.paged:
+            if self.rows:
+                self._write_page(self.rows)
+        else:
+            from tabulate import tabulate
+
+            self.out.write(
+                tabulate(
+                    self.rows,
+                    headers=Discrepancy.tabulation_headers(self.raw),
+                    tablefmt="rounded_grid",
+                )
+                + "\n"
+            )
+        if self.overflow:
+            self.out.write(
+                f"+{self.overflow} more discrepancies (--table-limit)\n"
+            )
+        self._write_truncation()
+        super()._close()
+
+
+class SummaryWriter(DiscrepancyWriter):
+    """Counts of the discrepancies by variant, top-level section, and path,
+    generalised by :func:`odiff.path.path_key`, tabulated on `close`; neither
+    the discrepancies nor their values are kept, so memory is proportional
+    to the number of distinct paths
+
+    Exclusions are counted by the walk, so are only reported with `stats`
+
+    :param summary: Optional[SummaryOptions], the number of busiest paths to
+        report, all if not given
+    """
+
+    def __init__(
+        self, *args, summary: Optional[SummaryOptions] = None, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.summary: SummaryOptions = summary or SummaryOptions()
+        self.variants: Counter = Counter()
+        self.paths: Counter = Counter()
+
+    def _write(self, d: Discrepancy):
+        self.variants[d.variant] += 1
+        self.paths[path_key(d.path)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The counts as a JSON-serializable dictionary"""
+        sections: Counter = Counter()
+        for key, n in self.paths.items():
+            section = _SECTION_RE.match(key)
+            sections[section.group(1) if section else "."] += n
+        return {
+            "total": self.count,
+            "truncated": self.truncated,
+            "excluded": None if self.stats is None else self.stats.exclusions,
+            "excluded_by": None
+            if self.stats is None
+            else dict(self.stats.excluded_by),
+            "variants": {v.value: self.variants[v] for v in Variant},
+            "sections": dict(sections.most_common()),
+            "paths": dict(self.paths.most_common(self.summary.top)),
+        }
+
+    def _close(self):
+        from tabulate import tabulate
+
+        summary: Dict[str, Any] = self.to_dict()
+        for heading, counts in [
+            ("Variant", summary["variants"]),
+            ("Section", summary["sections"]),
+            ("Path", summary["paths"]),
+        ]:
+            most: int = max(counts.values(), default=0)
+            self.out.write(
+                tabulate(
+                    [
+                        [k, n, "█" * -(-n * SUMMARY_BAR_W // max(most, 1))]
+                        for k, n in counts.items()
+                    ],
+                    headers=[heading, "Count", ""],
+                    tablefmt="rounded_outline",
+                )
+                + "\n"
+            )
+        if len(self.paths) > len(summary["paths"]):
+            self.out.write(
+                f"+{len(self.paths) - len(summary['paths'])} more paths\n"
+            )
+        self.out.write(f"Total: {summary['total']}\n")
+        self._write_truncation()
+        if summary["excluded"] is not None:
+            self.out.write(f"Excluded: {summary['excluded']}\n")
+            for exclusion, n in summary["excluded_by"].items():
+                self.out.write(f"  {exclusion}: {n}\n")
+        super()._close()
+
+
+class JsonSummaryWriter(SummaryWriter):
+    """The counts of :class:`SummaryWriter` as a JSON object"""
+
+    def _close(self):
+        self.out.write(json.dumps(self.to_dict(), indent=2) + "\n")
+        self.out.flush()
+
+
+WRITERS = {
+    OutputType.JSON: JsonWriter,
+    OutputType.JSONL: JsonLinesWriter,
+    OutputType.TABLE: TableWriter,
+    OutputType.OBJECT: ObjectWriter,
+    OutputType.SIMPLE: SimpleWriter,
+    OutputType.ONE_LINE: OneLineWriter,
+    OutputType.SUMMARY: SummaryWriter,
+    OutputType.SUMMARY_JSON: JsonSummaryWriter,
+}
+
+SUMMARY_TYPES = (OutputType.SUMMARY, OutputType.SUMMARY_JSON)
+
+
+def writer_for(
+    output_type: OutputType,
+    out: TextIO,
+    raw: bool = False,
+    unified_diff: Optional[UnifiedDiffOptions] = None,
+    stats: Optional[Stats] = None,
+    table: Optional[TableOptions] = None,
+    summary: Optional[SummaryOptions] = None,
+    limit: Optional[int] = None,
+) -> DiscrepancyWriter:
+    """Instantiate the writer for an output type, `table` and `summary`
+    applying to table and summary output alone"""
+    if output_type not in WRITERS:
+        raise Exception(f"Output type is not implemented ({output_type})")
+    if output_type == OutputType.TABLE:
+        return TableWriter(out, raw, unified_diff, stats, limit, table=table)
+    if output_type in SUMMARY_TYPES:
+        return WRITERS[output_type](
+            out, raw, unified_diff, stats, limit, summary=summary
+        )
+    return WRITERS[output_type](out, raw, unified_diff, stats, limit)
+
+
+def _indent(s: str, prefix: str = "  ") -> str:
+    return "\n".join(prefix + line for line in s.split("\n"))
+
+
+def _rule(widths: List[int], left: str, middle: str, right: str) -> str:
+    return left + middle.join("─" * (w + 2) for w in widths) + right + "\n"
+
+
+def _grid_row(cells: List[Any], widths: List[int]) -> str:
+    # Lines of each cell longer than its column are folded, not measured
+    columns: List[List[str]] = [
+        [
+            line[i : i + width]
+            for line in str(cell).split("\n")
+            for i in range(0, max(len(line), 1), width)
+        ]
+        for cell, width in zip(cells, widths)
+    ]
+    height: int = max(len(column) for column in columns)
+    return "".join(
+        "│ "
+        + " │ ".join(
+            (column[i] if i < len(column) else "").ljust(width)
+            for column, width in zip(columns, widths)
+        )
+        + " │\n"
+        for i in range(height)
+    )